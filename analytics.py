@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+# Investors listed under "Top Investors"
+TOP_INVESTORS = 5
+
+
+def drop_unused_categories(frame):
+    # Small result frames would otherwise carry (and ship to the browser) every category in the dataset
+    return frame.apply(lambda column: column.cat.remove_unused_categories()
+                       if isinstance(column.dtype, pd.CategoricalDtype) else column)
+
+
+def funding_types(rounds):
+    # Lower-case, '-' -> ' ' and '/' -> ' and ', keeping first-seen order
+    cleaned_types = []
+    for type_ in rounds:
+        type_ = type_.lower().replace('-', ' ').replace('/', ' and ').strip()
+        if type_ not in cleaned_types:
+            cleaned_types.append(type_)
+    return cleaned_types
+
+
+def month_over_month(monthly):
+    """Monthly funding series for both 'Total' and 'Count', keyed by the page's selectbox option."""
+    monthly = monthly.reset_index()
+    monthly['x_axis'] = monthly['month'].astype('str') + '-' + monthly['year'].astype('str')
+    return {
+        'Total': monthly[['year', 'month', 'x_axis', 'sum']].rename(columns={'sum': 'amount'}),
+        'Count': monthly[['year', 'month', 'x_axis', 'count']].rename(columns={'count': 'amount'}),
+    }
+
+
+def _plain_index(series):
+    # Categorical group keys from different batches don't align; plain labels do
+    series.index = series.index.astype(object)
+    return series
+
+
+def overall_partials(df):
+    """Mergeable building blocks of the Overall Analysis aggregates; see merge_partials."""
+    yearly_top = df.loc[df.groupby('year')['amount'].idxmax()][['year', 'startup', 'amount']]
+    return {
+        'total': float(df['amount'].to_numpy().sum(dtype='float64')),
+        'max_amount': df['amount'].max(),
+        'monthly': df.groupby(['year', 'month'], observed=True)['amount'].agg(['sum', 'count']),
+        'rounds': list(df['round'].unique()),
+        'city_counts': _plain_index(df.groupby('city', observed=True)['date'].count()),
+        'yearly_top': drop_unused_categories(yearly_top).set_index('year'),
+        'investor_totals': _plain_index(df.groupby('investors', observed=True)['amount'].sum()),
+    }
+
+
+def merge_partials(old, new):
+    """Partials for old + new deals, from the partials of each; cost depends on group counts, not deals."""
+    monthly = old['monthly'].add(new['monthly'], fill_value=0)
+    monthly['count'] = monthly['count'].astype(int)
+
+    # Earlier deals win ties, as idxmax over the full frame would pick them
+    current = old['yearly_top']['amount'].reindex(new['yearly_top'].index)
+    wins = current.isna() | (new['yearly_top']['amount'] > current)
+    yearly_top = pd.concat([old['yearly_top'].drop(wins.index[wins], errors='ignore'),
+                            new['yearly_top'][wins]]).sort_index()
+
+    seen = set(old['rounds'])
+    return {
+        'total': old['total'] + new['total'],
+        'max_amount': max(old['max_amount'], new['max_amount']),
+        'monthly': monthly,
+        'rounds': old['rounds'] + [type_ for type_ in new['rounds'] if type_ not in seen],
+        'city_counts': old['city_counts'].add(new['city_counts'], fill_value=0).astype(int),
+        'yearly_top': yearly_top,
+        'investor_totals': old['investor_totals'].add(new['investor_totals'], fill_value=0),
+    }
+
+
+def summarize_overall(partials, num_startups):
+    """Everything the Overall Analysis page shows; none of it depends on user input."""
+    city_counts = partials['city_counts'].reset_index()
+    city_counts.columns = ['City', 'Investment Count']
+
+    # Ties in name order, as the SQL backend orders them; only totals that can make the list are sorted
+    top_investors = partials['investor_totals']
+    if len(top_investors) > TOP_INVESTORS:
+        threshold = np.partition(top_investors.to_numpy(), -TOP_INVESTORS)[-TOP_INVESTORS]
+        top_investors = top_investors[top_investors >= threshold]
+    top_investors = top_investors.sort_index().sort_values(ascending=False, kind='stable')
+    top_investors = top_investors.head(TOP_INVESTORS).reset_index()
+    top_investors.columns = ['investors', 'amount']
+
+    return {
+        'total': round(partials['total']),
+        # The largest single deal is also the largest per-startup maximum
+        'max_fund': partials['max_amount'],
+        # Mean of per-startup totals is the grand total over the number of startups
+        'mean_fund': round(partials['total'] / num_startups) if num_startups else 0,
+        'num_startups': num_startups,
+        'month_over_month': month_over_month(partials['monthly']),
+        'funding_types': funding_types(partials['rounds']),
+        'city_counts': city_counts,
+        'yearly_top': partials['yearly_top'].reset_index(),
+        'top_investors': top_investors,
+    }
+
+
+def overall_aggregates(df):
+    return summarize_overall(overall_partials(df), df['startup'].nunique())
+
+
+def _totals(deals, by):
+    column = deals[by]
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        return deals.groupby(by)['amount'].sum().reset_index()
+    # Summed by code: a groupby over a column with hundreds of thousands of categories costs
+    # several times more than the investor's deals themselves
+    codes = column.cat.codes.to_numpy()
+    named = codes >= 0
+    size = len(column.cat.categories)
+    counts = np.bincount(codes[named], minlength=size)
+    # float64 even for no deals, where bincount ignores the weights
+    sums = np.bincount(codes[named], weights=np.nan_to_num(deals['amount'].to_numpy()[named]),
+                       minlength=size).astype(np.float64, copy=False)
+    observed = np.flatnonzero(counts)
+    return drop_unused_categories(pd.DataFrame({by: pd.Categorical.from_codes(observed, dtype=column.dtype),
+                                                'amount': sums[observed]}))
+
+
+# Investor page charts, each a total of the investor's amounts by one column of the deals
+INVESTOR_TOTALS = {'startup_totals': 'startup', 'vertical_totals': 'vertical', 'yearly': 'year'}
+
+
+def investor_totals(deals, key):
+    """The INVESTOR_TOTALS table `key` of an investor's deals."""
+    return _totals(deals, INVESTOR_TOTALS[key])
+
+
+def investor_summary(deals):
+    """The top of the investor page: headline metrics and the most recent deals."""
+    recent = deals.sort_values(by='date', ascending=False).head(5)[['date', 'startup', 'city', 'vertical', 'round', 'amount']]
+    return {
+        'deals': len(deals),
+        'total': float(deals['amount'].to_numpy().sum(dtype='float64')),
+        'startups': int(deals['startup'].nunique()),
+        'recent': drop_unused_categories(recent),
+    }
+
+
+def investor_report(deals):
+    """Everything the investor page shows, from the investor's deals; small enough to store per investor."""
+    return {**investor_summary(deals), **{key: investor_totals(deals, key) for key in INVESTOR_TOTALS}}
+
+
+def startup_report(profile, deals, similar):
+    """Everything the startup page shows: its profile (None if unknown), rounds table and similar companies."""
+    return {
+        'profile': None if profile is None else {field: profile[field] for field in ['city', 'vertical', 'subvertical']},
+        'deals': len(deals),
+        'rounds': funding_rounds_table(deals),
+        'similar': similar,
+    }
+
+
+def funding_rounds_table(deals):
+    """A startup's rounds as one table, newest first, for a single st.dataframe call."""
+    rounds = drop_unused_categories(deals.sort_values('date', ascending=False)[['date', 'round', 'investors']])
+    return rounds.assign(date=rounds['date'].dt.strftime('%Y-%m-%d')).rename(
+        columns={'date': 'Date', 'round': 'Round', 'investors': 'Investors'})
@@ -0,0 +1,278 @@
+"""Headless JSON API over the dashboard's analytics (service.py).
+
+    GET /api/health                      dataset version and rows
+    GET /api/filters                     date span and every city, vertical and round
+    GET /api/overall                     the Overall Analysis aggregates
+    GET /api/investors?q=sequoia         canonical names matching q (all names without q)
+    GET /api/investors/<name>            the investor page: metrics, recent deals, totals, co-investors
+    GET /api/investors/<name>/deals      the investor's deals, newest first
+    GET /api/startups?q=byjus
+    GET /api/startups/<name>             the startup page: profile, rounds, similar companies
+    GET /api/startups/<name>/deals
+
+Every endpoint takes the sidebar filters as parameters: start and end (YYYY-MM-DD) and city,
+vertical and round (repeatable). Names may be any spelling of the entity. Lists come in pages of
+per_page items (default 50, at most 500), selected with page (from 1).
+
+A response is a function of the dataset version and the request, so its ETag is derived from
+those alone: a request with a matching If-None-Match gets a 304 before anything is computed.
+
+The API runs on a daemon thread of the dashboard process when DASHBOARD_API_PORT is set, serving
+the same warm dataset and result caches as the pages:
+
+    DASHBOARD_API_PORT=8600 streamlit run app.py
+
+or as a sidecar, which loads its own copy from the snapshot (or the SQL store) and reads the same
+precomputed reports:
+
+    python api.py --port 8600
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from analytics import INVESTOR_TOTALS
+from filters import FILTER_COLUMNS, NO_FILTERS
+from search import search_names
+import service
+
+logger = logging.getLogger(__name__)
+
+PORT_VAR = 'DASHBOARD_API_PORT'
+HOST_VAR = 'DASHBOARD_API_HOST'
+PER_PAGE = 50
+MAX_PER_PAGE = 500
+# Part of every ETag; bump when the shape of a response changes
+API_FORMAT = 2
+DEAL_COLUMNS = ['date', 'startup', 'vertical', 'subvertical', 'city', 'investors', 'round', 'amount']
+
+_server = None
+_lock = threading.Lock()
+
+
+def port():
+    value = os.environ.get(PORT_VAR)
+    return int(value) if value else None
+
+
+def jsonable(value):
+    """value with frames as lists of records, dates as ISO strings and NaN as None."""
+    if isinstance(value, pd.DataFrame):
+        return json.loads(value.to_json(orient='records', date_format='iso'))
+    if isinstance(value, pd.Series):
+        return jsonable(value.to_dict())
+    if isinstance(value, dict):
+        return {str(key): jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if value is pd.NA or value is pd.NaT:
+        return None
+    return value
+
+
+def _one(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def parse_filters(source, params):
+    """The sidebar filters dict for the request's start, end, city, vertical and round parameters."""
+    filters = {**NO_FILTERS, **{column: params.get(column, []) for column in FILTER_COLUMNS}}
+    start, end = _one(params, 'start'), _one(params, 'end')
+    if start or end:
+        span = service.filter_options(source)['dates']
+        if span is None:
+            raise ValueError('the dataset has no dated deals to filter')
+        try:
+            filters['dates'] = (datetime.date.fromisoformat(start) if start else span[0],
+                                datetime.date.fromisoformat(end) if end else span[1])
+        except ValueError:
+            raise ValueError('start and end must be dates in YYYY-MM-DD format') from None
+    return filters
+
+
+def paginate(items, params):
+    """One page of items (a list or frame) with the paging details."""
+    try:
+        page = int(_one(params, 'page', 1))
+        per_page = int(_one(params, 'per_page', PER_PAGE))
+    except ValueError:
+        raise ValueError('page and per_page must be integers') from None
+    if page < 1 or not 1 <= per_page <= MAX_PER_PAGE:
+        raise ValueError(f'page must be at least 1 and per_page between 1 and {MAX_PER_PAGE}')
+    lo = (page - 1) * per_page
+    selected = items.iloc[lo:lo + per_page] if isinstance(items, pd.DataFrame) else items[lo:lo + per_page]
+    return {'items': jsonable(selected), 'page': page, 'per_page': per_page, 'total': len(items),
+            'pages': math.ceil(len(items) / per_page)}
+
+
+def etag(version, path, params):
+    key = json.dumps([API_FORMAT, version, path, sorted(params.items())])
+    return '"' + hashlib.sha1(key.encode()).hexdigest() + '"'
+
+
+def _entity(source, kind, name):
+    canonical = service.canonical_name(source, kind, name)
+    if canonical is None:
+        raise LookupError(f'no {kind} named {name!r}')
+    return canonical
+
+
+def _names(source, kind, params):
+    query = _one(params, 'q')
+    if query:
+        return paginate(search_names(service.name_indexes(source)[kind], query), params)
+    return paginate(service.entity_names(source, kind), params)
+
+
+def _deals(source, kind, name, filters, mask, params):
+    fetch = service.investor_deals if kind == 'investor' else service.startup_deals
+    deals = fetch(source, name, filters, mask)
+    return {'name': name, 'deals': paginate(deals.sort_values('date', ascending=False, kind='stable')[DEAL_COLUMNS],
+                                            params)}
+
+
+def _investor(source, name, filters, mask):
+    report = service.report(source, 'investor', name, filters, mask)
+    if not report['deals']:
+        return {'name': name, 'deals': 0}
+    deals = lambda: service.investor_deals(source, name, filters, mask)
+    tables = {table: service.investor_table(source, name, table, filters, report, deals) for table in INVESTOR_TOTALS}
+    return jsonable({'name': name, **{key: report[key] for key in ['deals', 'total', 'startups', 'recent']},
+                     **tables, 'co_investors': service.co_investors(source, name, filters, mask)})
+
+
+def _startup(source, name, filters, mask):
+    report = service.report(source, 'startup', name, filters, mask)
+    similar = report['similar']
+    if similar is None:
+        vertical = report['profile']['vertical'] if report['profile'] is not None else None
+        similar = service.similar_startups(source, name, vertical, filters, mask)
+    return jsonable({'name': name, **report, 'similar': similar})
+
+
+def respond(source, path, params):
+    """The JSON body for a GET of path with the parsed query string params.
+
+    Raises LookupError for an unknown endpoint or entity and ValueError for bad parameters.
+    """
+    parts = [unquote(part) for part in path.strip('/').split('/')]
+    if parts[:1] != ['api'] or len(parts) < 2:
+        raise LookupError(f'no endpoint {path}')
+    endpoint, rest = parts[1], parts[2:]
+    if endpoint == 'health' and not rest:
+        return {'version': source['version'], 'rows': service.source_rows(source)}
+    if endpoint == 'filters' and not rest:
+        return jsonable(service.filter_options(source))
+
+    filters = parse_filters(source, params)
+    mask = service.filter_mask(source, filters)
+    if endpoint == 'overall' and not rest:
+        return jsonable(service.overall(source, filters, mask))
+    kind = {'investors': 'investor', 'startups': 'startup'}.get(endpoint)
+    if kind is None or len(rest) > 2 or rest[1:] not in ([], ['deals']):
+        raise LookupError(f'no endpoint {path}')
+    if not rest:
+        return _names(source, kind, params)
+    name = _entity(source, kind, rest[0])
+    if rest[1:]:
+        return _deals(source, kind, name, filters, mask, params)
+    return (_investor if kind == 'investor' else _startup)(source, name, filters, mask)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'StartupFundingAPI/1'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        source = service.current_source()
+        tag = etag(source['version'], url.path, params)
+        if tag in (part.strip() for part in self.headers.get('If-None-Match', '').split(',')):
+            self._send(HTTPStatus.NOT_MODIFIED, None, tag)
+            return
+        try:
+            body = respond(source, url.path, params)
+        except LookupError as exc:
+            self._send(HTTPStatus.NOT_FOUND, {'error': str(exc)})
+        except ValueError as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {'error': str(exc)})
+        except Exception:
+            logger.exception('Failed to answer %s', self.path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'internal error'})
+        else:
+            self._send(HTTPStatus.OK, body, tag)
+
+    def _send(self, status, body, tag=None):
+        payload = b'' if body is None else json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        if tag is not None:
+            self.send_header('ETag', tag)
+            # Clients may keep responses but must revalidate, which costs them a 304 at most
+            self.send_header('Cache-Control', 'no-cache')
+        if body is not None:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+
+def make_server(host, port):
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_process(port, host=None):
+    """Serve the API from a daemon thread of this process, once; later calls are no-ops."""
+    global _server
+    with _lock:
+        if _server is not None:
+            return
+        try:
+            _server = make_server(host or os.environ.get(HOST_VAR, '127.0.0.1'), port)
+        except OSError as exc:
+            # e.g. another dashboard process already serves it; don't retry on every rerun
+            _server = False
+            logger.warning('JSON API not started on port %s: %s', port, exc)
+            return
+        threading.Thread(target=_server.serve_forever, name='dashboard-api', daemon=True).start()
+        logger.info('JSON API listening on port %s', port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the dashboard analytics as a JSON API')
+    parser.add_argument('--host', default=os.environ.get(HOST_VAR, '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=port() or 8600)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    # Load the dataset before the first request rather than during it
+    service.current_source()
+    server = make_server(args.host, args.port)
+    logger.info('JSON API listening on %s:%s', args.host, args.port)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,180 +1,246 @@
+import time
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
+from streamlit.runtime.memory_uploaded_file_manager import MemoryUploadedFileManager
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import api
+import background
+from caching import MB, render_stats, session_cache, shared_cache
+from charts import INVESTOR_CHARTS, overall_figures
+from data import CLEAN_COLUMNS, append_deals, load_upload, uploaded_dataset
+import filters as deal_filters
+from profiling import render_panel, section, start_run
+from search import search_names
+import service
+import sqlstore
+
+# How often the sidebar checks on an uploaded file being built
+UPLOAD_POLL_SECONDS = 0.25
 
 # Set the Streamlit page configuration
 st.set_page_config(layout='wide', page_title='Startup Funding Analysis')
 
 
-# Cache the data loading to improve performance
-@st.cache_data
-def load_data():
-    df = pd.read_csv("startup_cleaned (1).csv")
-
-    # Fix years in the date column
-    def fix_year(date_str):
-        if date_str.count("/") == 2:
-            parts = date_str.split("/")
-            if len(parts[2]) == 3:  # If the year has only 3 digits, fix it
-                parts[2] = parts[2].zfill(4)
-            return "/".join(parts)
-        return date_str
-
-    df['date'] = df['date'].apply(fix_year)
-    df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-    df['year'] = df['date'].dt.year
-    df['month'] = df['date'].dt.month
-    return df
-
-
-# Load data
-df = load_data()
+# What the pages show comes from service.py, shared with the HTTP API; figures per filter
+# combination or entity go to bounded LRU caches (caching.py). Underscored arguments are the
+# inputs for that version and are not part of the key
+@shared_cache('overall_figures', max_entries=64, max_bytes=64 * MB)
+def load_overall_figures(version, filters, _aggregates):
+    return overall_figures(_aggregates)
+
+
+@shared_cache('investor_figures', max_entries=768, max_bytes=128 * MB, ttl=3600)
+def load_investor_figure(version, filters, investor_name, chart, _source, _report, _deals):
+    # One investor page chart; runs on the section pool. Precomputed reports carry the chart's
+    # totals, live ones get them from the deals fetched by the page's _deals future
+    table, build = INVESTOR_CHARTS[chart]
+    totals = service.investor_table(_source, investor_name, table, filters, _report, lambda: _deals.result())
+    return build(totals, investor_name)
+
+
+def release_upload(file):
+    # Streamlit keeps every uploaded file's bytes for the session; the build has its own reference
+    # and closes it once the chunks are read, so drop Streamlit's copy now and reset the uploader
+    ctx = get_script_run_ctx()
+    if isinstance(ctx.uploaded_file_mgr, MemoryUploadedFileManager):
+        ctx.uploaded_file_mgr.remove_file(session_id=ctx.session_id, file_id=file.file_id)
+    st.session_state['uploads_started'] = st.session_state.get('uploads_started', 0) + 1
+
+
+def list_companies(row):
+    # The shared portfolio companies named by the graph, and how many more there are
+    more = row['shared'] - len(row['companies'])
+    return ', '.join(row['companies']) + (f' (+{more} more)' if more else '')
+
+
+# Load data: either the in-memory deals with their indexes and overall aggregates (the default),
+# or the embedded SQL store when DASHBOARD_BACKEND=sqlite, which the pages query for result rows only
+source = service.current_source()
+# ...unless this session is analyzing a file of its own (see the upload expander below)
+upload = None
+if 'upload_version' in st.session_state:
+    upload = uploaded_dataset(st.session_state['upload_version'])
+    if upload is None:
+        st.session_state.pop('upload_version')
+        st.sidebar.warning('⚠️ Your uploaded file is no longer loaded; please upload it again.')
+    else:
+        source = upload
+version, num_rows = source['version'], service.source_rows(source)
+name_indexes = service.name_indexes(source)
+# The JSON API (api.py) serves the same warm data and caches from a thread of this process
+if api.port() is not None:
+    api.start_in_process(api.port())
+
+
+def sidebar_filters(options):
+    # Global filters: every page, metric and chart covers only the deals that pass them
+    with st.sidebar.expander('🔎 Filters'):
+        dates = None
+        if options['dates']:
+            picked = st.date_input('Date range', value=options['dates'], min_value=options['dates'][0],
+                                   max_value=options['dates'][1])
+            # Only a complete range that narrows the full span filters anything
+            if len(picked) == 2 and tuple(picked) != options['dates']:
+                dates = tuple(picked)
+        return {
+            'dates': dates,
+            'city': st.multiselect('City', options['city']),
+            'vertical': st.multiselect('Vertical', options['vertical']),
+            'round': st.multiselect('Round', options['round']),
+        }
+
+
+@session_cache('name_search', max_entries=64, max_bytes=MB)
+def find_names(version, kind, query):
+    # What this session typed; other sessions' queries would only crowd the shared caches
+    return search_names(name_indexes[kind], query)
 
 
 # Define the function for overall analysis
 def load_overall_analysis():
     st.title('Overall Startup Funding Analysis')
+    with section('overall.aggregates', rows=num_rows):
+        aggregates = service.overall(source, filters, mask)
+    if not aggregates['num_startups']:
+        st.write("🚫 No deals match the selected filters.")
+        return
+    with section('overall.figures', rows=num_rows):
+        figures = load_overall_figures(version, filters, aggregates)
 
     # Metrics Display
-    col1, col2, col3, col4 = st.columns(4)
+    with section('overall.metrics'):
+        col1, col2, col3, col4 = st.columns(4)
 
-    with col1:
-        total = round(df['amount'].sum())
-        st.metric('💰 Total Funding', f'{total} Cr')
+        with col1:
+            st.metric('💰 Total Funding', f"{aggregates['total']} Cr")
 
-    with col2:
-        max_fund = df.groupby('startup')['amount'].max().sort_values(ascending=False).head(1).values[0]
-        st.metric('🚀 Max Funding', f'{max_fund} Cr')
+        with col2:
+            st.metric('🚀 Max Funding', f"{aggregates['max_fund']} Cr")
 
-    with col3:
-        mean_fund = round(df.groupby('startup')['amount'].sum().mean())
-        st.metric('📊 Average Funding', f'{mean_fund} Cr')
+        with col3:
+            st.metric('📊 Average Funding', f"{aggregates['mean_fund']} Cr")
 
-    with col4:
-        num_startups = df['startup'].nunique()
-        st.metric('🏢 Funded Startups', num_startups)
+        with col4:
+            st.metric('🏢 Funded Startups', aggregates['num_startups'])
 
     # Month-over-Month Funding Analysis
     st.header('📅 Month-over-Month Funding Analysis')
     selected_option = st.selectbox('Select Analysis Type', ['Total', 'Count'])
 
-    if selected_option == 'Total':
-        temp_df = df.groupby(['year', 'month'])['amount'].sum().reset_index()
-    else:
-        temp_df = df.groupby(['year', 'month'])['amount'].count().reset_index()
-
-    temp_df['x_axis'] = temp_df['month'].astype('str') + '-' + temp_df['year'].astype('str')
-    fig3 = px.line(temp_df, x='x_axis', y='amount',
-                   title=f'{selected_option} Funding Amount by Month and Year',
-                   labels={'x_axis': 'Month-Year', 'amount': f'{selected_option} Amount'},
-                   markers=True)
-    st.plotly_chart(fig3, use_container_width=True)
+    # Both variants are prebuilt, so toggling only swaps the figure
+    with section('overall.month_over_month') as timer:
+        st.plotly_chart(timer.payload(figures['month_over_month'][selected_option]), width='stretch')
 
     # Funding Types Overview
     st.header("📊 Funding Types Overview")
-    types = df["round"].unique()
-    cleaned_types = []
-    for type_ in types:
-        type_ = type_.lower().replace('-', ' ').replace('/', ' and ').strip()
-        if type_ not in cleaned_types:
-            cleaned_types.append(type_)
-    st.write("🔍 **Funding Types:** " + ", ".join(cleaned_types))
+    st.write("🔍 **Funding Types:** " + ", ".join(aggregates['funding_types']))
 
     # City-wise Investment Count
     st.header("🌆 City-wise Investment Count")
-    city_date_counts = df.groupby('city')['date'].count().reset_index()
-    city_date_counts.columns = ['City', 'Investment Count']
-
-    fig = px.bar(city_date_counts, x='City', y='Investment Count',
-                 title='Investment Count by City',
-                 labels={'City': 'City', 'Investment Count': 'Count'},
-                 color='Investment Count',
-                 color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    with section('overall.city_counts') as timer:
+        st.plotly_chart(timer.payload(figures['city_counts']), width='stretch')
 
     # Year-wise Maximum Funding Analysis
     st.header("📈 Year-wise Analysis of Maximum Funding Received")
-    top = df.loc[df.groupby("year")["amount"].idxmax()][["year", "startup", "amount"]].reset_index(drop=True)
-    st.dataframe(top)
+    with section('overall.yearly_top') as timer:
+        st.dataframe(timer.payload(aggregates['yearly_top']))
 
     # Top Investors
     st.header("🏆 Top 5 Investors Based on Funding Amount")
-    top_investor = df.groupby("investors")["amount"].sum().sort_values(ascending=False).reset_index().head(5)
+    top_investor = aggregates['top_investors']
 
-    # Display the top investors in a table
-    st.dataframe(top_investor)
+    with section('overall.top_investors') as timer:
+        # Display the top investors in a table
+        st.dataframe(timer.payload(top_investor))
 
-    # Bar chart for top investors
-    fig = px.bar(top_investor,
-                 x='investors',
-                 y='amount',
-                 title='Top 5 Investors by Funding Amount',
-                 labels={'amount': 'Total Investment Amount', 'investors': 'Investors'},
-                 color='amount',
-                 color_continuous_scale='Viridis')
-
-    # Display the chart in Streamlit
-    st.plotly_chart(fig)
+        # Bar chart for top investors
+        st.plotly_chart(timer.payload(figures['top_investors']))
 
 
 # Define function for investor detail
 def load_investor_detail(investor_name):
     st.title(f'📊 Investor Analysis: {investor_name}')
 
-    # Filter data for the selected investor
-    investor_data = df[df['investors'].str.contains(investor_name, na=False)]
+    # Everything the page shows for the selected investor
+    with section('investor.lookup') as timer:
+        report = service.report(source, 'investor', investor_name, filters, mask)
+        timer.rows(report['deals'])
 
-    if investor_data.empty:
-        st.write("🚫 No investment data found for this investor.")
+    if not report['deals']:
+        if deal_filters.is_active(filters):
+            st.write("🚫 None of this investor's deals match the selected filters.")
+        else:
+            st.write("🚫 No investment data found for this investor.")
         return
 
-    # Recent Investments
-    st.subheader('🆕 Recent Investments')
-    recent_investments = investor_data.sort_values(by='date', ascending=False).head(5)[
-        ['date', 'startup', 'city', 'vertical', 'round', 'amount']]
-    st.dataframe(recent_investments)
-
-    # Biggest Investments
-    st.subheader('💰 Biggest Investments')
-    big_series = investor_data.groupby('startup')['amount'].sum().sort_values(ascending=False).reset_index()
-
-    fig = px.bar(big_series, x='startup', y='amount',
-                 title=f'Biggest Investments by {investor_name}',
-                 labels={'startup': 'Startup', 'amount': 'Total Investment'},
-                 color='amount', color_continuous_scale='Blues')
-    st.plotly_chart(fig, use_container_width=True)
+    # The charts take longest: start them now and fill them in as they finish
+    deals = None
+    if not all(table in report for table, _ in INVESTOR_CHARTS.values()):
+        deals = background.submit(service.investor_deals, source, investor_name, filters, mask)
+    futures = {chart: background.submit(load_investor_figure, version, filters, investor_name, chart, source, report,
+                                        deals)
+               for chart in INVESTOR_CHARTS}
 
-    # Sector Investment Distribution
-    st.subheader('📈 Sector Investment Distribution')
-    vertical_series = investor_data.groupby('vertical')['amount'].sum().reset_index()
+    with section('investor.metrics'):
+        col1, col2, col3 = st.columns(3)
+        col1.metric('🤝 Deals', report['deals'])
+        col2.metric('💰 Total Invested', f"{round(report['total'])} Cr")
+        col3.metric('🏢 Startups', report['startups'])
 
-    fig2 = px.pie(vertical_series, names='vertical', values='amount',
-                  title='Investment Distribution by Sector', hole=0.3)
-    st.plotly_chart(fig2, use_container_width=True)
-
-    # Yearly Investment Trend
-    st.subheader('📅 Yearly Investment Trend')
-    year_series = investor_data.groupby('year')['amount'].sum().reset_index()
-
-    fig3 = px.line(year_series, x='year', y='amount',
-                   title='Year Over Year Investment',
-                   labels={'year': 'Year', 'amount': 'Total Investment'},
-                   markers=True)
-    st.plotly_chart(fig3, use_container_width=True)
+    # Recent Investments
+    st.subheader('🆕 Recent Investments')
+    with section('investor.recent', rows=report['deals']) as timer:
+        st.dataframe(timer.payload(report['recent']))
+
+    # Who this investor backs deals with, from the co-investment graph
+    st.subheader('🤝 Top Co-Investors')
+    with section('investor.co_investors') as timer:
+        co_investors = service.co_investors(source, investor_name, filters, mask)
+        timer.rows(len(co_investors))
+        if co_investors.empty:
+            st.write('This investor has no co-investors in these deals.')
+        else:
+            shown = pd.DataFrame({
+                'Co-Investor': co_investors['investor'],
+                'Deals Together': co_investors['deals'],
+                'Amount Together (Cr)': co_investors['amount'].round(2),
+                'Shared Companies': co_investors.apply(list_companies, axis=1),
+            })
+            st.dataframe(timer.payload(shown), hide_index=True, width='stretch')
+
+    def chart_section(chart):
+        def render(figure):
+            with section(f'investor.{chart}') as timer:
+                st.plotly_chart(timer.payload(figure), width='stretch')
+        return render
+
+    sections = {}
+    for chart, title in [('biggest', '💰 Biggest Investments'), ('sectors', '📈 Sector Investment Distribution'),
+                         ('yearly', '📅 Yearly Investment Trend')]:
+        st.subheader(title)
+        sections[futures[chart]] = (background.placeholder(), chart_section(chart))
+    background.stream(sections)
 
 
 def load_startup_detail(startup):
     st.title(f"Comprehensive Details of the {startup} Company")
+    # Everything the page shows for the selected startup
+    with section('startup.lookup') as timer:
+        report = service.report(source, 'startup', startup, filters, mask)
+        timer.rows(report['deals'])
+    profile = report['profile']
 
-
+    # Precomputed reports list the similar companies; otherwise look them up while the rest renders
+    similar = None
+    if profile is not None and pd.notna(profile['vertical']) and report['similar'] is None:
+        similar = background.submit(service.similar_startups, source, startup, profile['vertical'], filters, mask)
 
     # Location of Startup
-    name = startup
-    location = df[df['startup'].str.contains(name, case=False, na=False)]['city'].reset_index()
-
-    if not location.empty:
+    if profile is not None and pd.notna(profile['city']):
         st.subheader(f"📍 Location Details for {startup}")
-        st.write(f"**City:** {location.loc[0]['city']}")
+        st.write(f"**City:** {profile['city']}")
         st.write(
             "🔍 _Note: This is based on available records. If the city name is not as expected, it might be due to variations in the dataset._")
     else:
@@ -184,77 +250,70 @@ def load_startup_detail(startup):
 
 #     Industry and Sub Industry
 
-    # Fetch industry details
-    industry = df[df['startup'].str.contains(name, case=False, na=False)]['vertical'].reset_index()
-
-    # Fetch sub-industry details
-    subindustry = df[df['startup'].str.contains(name, case=False, na=False)]['subvertical'].reset_index()
+    industry = profile['vertical'] if profile is not None else None
+    subindustry = profile['subvertical'] if profile is not None else None
 
     # Display industry and sub-industry information
-    if not industry.empty and not subindustry.empty:
+    if pd.notna(industry) and pd.notna(subindustry):
         st.subheader(f"🏢 Industry Details for {startup}")
-        st.write(f"**Industry:** {industry.loc[0]['vertical']}")
-        st.write(f"**Sub-Industry:** {subindustry.loc[0]['subvertical']}")
+        st.write(f"**Industry:** {industry}")
+        st.write(f"**Sub-Industry:** {subindustry}")
         st.write("📌 _These details are based on the available data. If the information seems incomplete, it may be due to dataset variations._")
-    elif not industry.empty:
+    elif pd.notna(industry):
         st.subheader(f"🏢 Industry Details for {startup}")
-        st.write(f"**Industry:** {industry.loc[0]['vertical']}")
+        st.write(f"**Industry:** {industry}")
         st.write("⚠️ _Sub-Industry information is not available._")
-    elif not subindustry.empty:
+    elif pd.notna(subindustry):
         st.subheader(f"🏢 Sub-Industry Details for {startup}")
-        st.write(f"**Sub-Industry:** {subindustry.loc[0]['subvertical']}")
+        st.write(f"**Sub-Industry:** {subindustry}")
         st.write("⚠️ _Industry information is not available._")
     else:
         st.subheader(f"🚫 No Industry Data Found for {startup}")
         st.write("We couldn't find any industry or sub-industry information for this startup. Please check the startup name for accuracy or variations in spelling.")
 
-    # Funding Rounds
-    # Fetch investment details: date, investors, and round information
-    investment_details = df[df['startup'].str.contains(name, case=False, na=False)][
-        ['date', 'investors', 'round']].reset_index()
+    # Funding Rounds: date, investors, and round information
+    rounds_table = report['rounds']
 
     # Display the investment details
-    if not investment_details.empty:
+    if report['deals']:
         st.subheader(f"💼 Investment Details for {startup}")
         st.write("Here are the details of the investment rounds for this startup:")
 
-        for i in range(len(investment_details)):
-            st.write(f"**Date:** {investment_details.loc[i]['date']}")
-            st.write(f"**Investors:** {investment_details.loc[i]['investors']}")
-            st.write(f"**Round:** {investment_details.loc[i]['round']}")
-            st.markdown("---")  # Divider between entries
+        # One table for all rounds instead of a write per field per round
+        with section('startup.rounds_render') as timer:
+            st.dataframe(timer.payload(rounds_table), hide_index=True, width='stretch')
 
         st.write(
             "🔍 _Note: The information above is based on available records. If details appear missing or inconsistent, it may be due to data variations._")
     else:
         st.subheader(f"🚫 No Investment Data Found for {startup}")
-        st.write(
-            "We couldn't find any investment information for this startup. Please check the startup name for accuracy or variations in spelling.")
-
-    # Fetch the industry (vertical) details for the startup
-    industry = df[df['startup'].str.contains(name, case=False, na=False)][['vertical']].reset_index()
+        if deal_filters.is_active(filters):
+            st.write("None of this startup's deals match the selected filters.")
+        else:
+            st.write(
+                "We couldn't find any investment information for this startup. Please check the startup name for accuracy or variations in spelling.")
 
-    if not industry.empty:
-        vertical = industry.loc[0]['vertical']
-        # Find other startups in the same vertical
-        similar_companies = df[df['vertical'].str.contains(vertical, case=False, na=False)]['startup'].reset_index()
+    if pd.notna(industry):
+        vertical = industry
 
-        # Filter out the current startup and get up to 5 similar companies
-        similar_companies_list = [similar_companies.loc[i]['startup'] for i in range(len(similar_companies))
-                                  if similar_companies.loc[i]['startup'].lower() != name.lower()][:5]
+        def render_similar(similar_companies_list):
+            if not similar_companies_list:
+                st.subheader(f"🔍 No Other Similar Companies Found for {startup}")
+                st.write(f"There are no other companies listed under the vertical **{vertical}** similar to {startup}.")
+            else:
+                st.subheader(f"🏢 Similar Companies in the Same Industry as {startup}")
+                st.write(f"Here are up to 5 other companies operating in the **{vertical}** industry:")
 
-        if not similar_companies_list:
-            st.subheader(f"🔍 No Other Similar Companies Found for {startup}")
-            st.write(f"There are no other companies listed under the vertical **{vertical}** similar to {startup}.")
-        else:
-            st.subheader(f"🏢 Similar Companies in the Same Industry as {startup}")
-            st.write(f"Here are up to 5 other companies operating in the **{vertical}** industry:")
+                for company in similar_companies_list:
+                    st.write(f"- {company}")
 
-            for company in similar_companies_list:
-                st.write(f"- {company}")
+                st.write(
+                    "🔍 _Note: These companies are based on available records in the dataset. There may be more companies in this vertical not listed here._")
 
-            st.write(
-                "🔍 _Note: These companies are based on available records in the dataset. There may be more companies in this vertical not listed here._")
+        if similar is None:
+            render_similar(report['similar'])
+        else:
+            background.stream({similar: (background.placeholder(), render_similar)})
     else:
         st.subheader(f"🚫 No Industry Data Found for {startup}")
         st.write(
@@ -262,16 +321,97 @@ def load_startup_detail(startup):
 
 
 # Sidebar navigation
+start_run()
 st.sidebar.title("Startup Funding Dashboard")
 option = st.sidebar.radio("Choose an Option", ['Overall Analysis', 'Startup', 'Investor'])
+filters = sidebar_filters(service.filter_options(source))
+mask = service.filter_mask(source, filters)
 
 if option == 'Overall Analysis':
     load_overall_analysis()
 elif option == 'Investor':
-    selected_investor = st.sidebar.selectbox('Select Investor', sorted(set(df['investors'].str.split(',').sum())))
-    if st.sidebar.button('Show Investor Details'):
-        load_investor_detail(selected_investor)
+    # Only the top matches for the typed name go to the browser, not every investor
+    investor_query = st.sidebar.text_input('Search Investor', placeholder='e.g. Sequoia')
+    investor_matches = find_names(version, 'investor', investor_query)
+    if investor_matches:
+        selected_investor = st.sidebar.selectbox('Select Investor', investor_matches)
+        if st.sidebar.button('Show Investor Details'):
+            load_investor_detail(selected_investor)
+    elif investor_query:
+        st.sidebar.write('🚫 No investors match that name.')
 else:
-    selected_startup = st.sidebar.selectbox('Select StartUp', sorted(set(df['startup'])))
-    if st.sidebar.button('Show StartUp Details'):
-        load_startup_detail(selected_startup)
\ No newline at end of file
+    startup_query = st.sidebar.text_input('Search StartUp', placeholder="e.g. Byju's")
+    startup_matches = find_names(version, 'startup', startup_query)
+    if startup_matches:
+        selected_startup = st.sidebar.selectbox('Select StartUp', startup_matches)
+        if st.sidebar.button('Show StartUp Details'):
+            load_startup_detail(selected_startup)
+    elif startup_query:
+        st.sidebar.write('🚫 No startups match that name.')
+
+# Analyze a deals file of the user's own instead of the served dataset, for this session only
+with st.sidebar.expander('📂 Analyze Your Own File', expanded=upload is not None):
+    if upload is not None:
+        st.write(f"Showing your file: **{st.session_state['upload_name']}** ({len(upload['df']):,} deals).")
+        if upload['rejected']:
+            st.warning(f"⚠️ Skipped {upload['rejected']:,} rows with an invalid date or amount, or a missing field.")
+        if st.button('Back to the full dataset'):
+            st.session_state.pop('upload_version')
+            st.rerun()
+    # A new key per upload: the uploader starts empty again once its file has been handed over
+    own_file = st.file_uploader('CSV in the cleaned schema', type='csv',
+                                key=f"own_file_{st.session_state.get('uploads_started', 0)}",
+                                help='Columns: ' + ', '.join(CLEAN_COLUMNS))
+    if own_file is not None and 'upload_job' not in st.session_state and st.button('Analyze File'):
+        # Cleaned and indexed on the section pool, so the build outlives reruns of this script
+        # and the page stays responsive; the worker reports its progress here
+        progress = {'read': 0.0, 'rows': 0}
+
+        def report_progress(rows, file=own_file):
+            progress.update(read=min(file.tell() / max(file.size, 1), 1.0), rows=rows)
+
+        st.session_state['upload_job'] = (background.submit(load_upload, own_file, report_progress), own_file.name,
+                                          progress)
+        release_upload(own_file)
+        st.rerun()
+    if 'upload_job' in st.session_state:
+        job, job_name, progress = st.session_state['upload_job']
+        bar = st.progress(0.0, text='Reading…')
+        while not job.done():
+            if progress['read'] < 1.0:
+                bar.progress(progress['read'], text=f"Cleaned {progress['rows']:,} rows…")
+            else:
+                bar.progress(1.0, text='Building indexes…')
+            time.sleep(UPLOAD_POLL_SECONDS)
+        st.session_state.pop('upload_job')
+        bar.empty()
+        try:
+            uploaded = job.result()
+        except ValueError as exc:
+            st.error(f'🚫 {exc}')
+        else:
+            st.session_state['upload_version'] = uploaded['version']
+            st.session_state['upload_name'] = job_name
+            st.rerun()
+
+# Append a batch of new deals without a full reload; appends go to the served dataset
+if upload is None:
+    with st.sidebar.expander('➕ Append Deals'):
+        delta_file = st.file_uploader('Delta CSV in the cleaned schema', type='csv')
+        if delta_file is not None and st.button('Append'):
+            try:
+                appended, rejected = (sqlstore.append_deals if service.uses_store(source) else append_deals)(delta_file)
+            except ValueError as exc:
+                st.error(f'🚫 {exc}')
+            else:
+                st.session_state['append_result'] = (appended, len(rejected))
+                st.rerun()
+        if 'append_result' in st.session_state:
+            appended, rejected = st.session_state.pop('append_result')
+            st.success(f'✅ Appended {appended} deals.')
+            if rejected:
+                st.warning(f'⚠️ Skipped {rejected} rows with an invalid date or amount, or a missing field.')
+
+# Per-section timings when profiling is enabled, and the result cache counters always
+render_panel()
+render_stats()
@@ -0,0 +1,54 @@
+"""Shared thread pool for the slow sections of the detail pages.
+
+A detail page renders its cheap top part (metrics and tables) straight away and hands each heavy
+section (a chart, the similar companies list) to this pool; stream() then fills the section's
+placeholder as its result arrives, in completion order rather than page order.
+
+Workers only compute: every st.* call and profiling section runs in the script thread. Section
+functions should go through a shared cache (caching.shared_cache), which also makes repeated or
+concurrent requests for the same entity share one computation instead of queueing duplicates.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+# Threads shared by every session of the process; the pandas and numpy work in a section mostly
+# releases the GIL, and more threads than this only queue behind each other
+WORKERS = min(4, (os.cpu_count() or 1) + 1)
+
+_pool = None
+_lock = threading.Lock()
+
+
+def executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='dashboard-section')
+        return _pool
+
+
+def submit(func, *args):
+    """Start func(*args) on the shared pool; returns its Future."""
+    return executor().submit(func, *args)
+
+
+def placeholder(label='⏳ Loading…'):
+    """An element to fill later with stream(), showing label until then."""
+    slot = st.empty()
+    slot.caption(label)
+    return slot
+
+
+def stream(sections):
+    """Render sections as their results arrive.
+
+    sections maps a Future to (placeholder, render); render(result) is called in the script thread
+    inside placeholder.container(), replacing the loading label.
+    """
+    for future in as_completed(sections):
+        slot, render = sections[future]
+        with slot.container():
+            render(future.result())
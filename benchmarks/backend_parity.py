@@ -0,0 +1,156 @@
+"""Check that the SQLite backend (sqlstore.py) returns what the pandas path returns.
+
+Every page query is compared on the bundled CSV: the Overall aggregates, the alias tables and
+name lists, the investor deals, startup profile, rounds and similar companies of every investor
+and startup, and the co-investment graph. The filter options, row masks and Overall aggregates
+(from the aggregate cube and from the rows on the pandas side) and detail queries under a few sidebar filter
+combinations are compared too.
+Run from the repository root; exits 1 on any mismatch:
+
+    python -m benchmarks.backend_parity
+    python -m benchmarks.backend_parity --csv other_cleaned.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import filters as deal_filters
+import sqlstore
+from cube import cube_aggregates, row_aggregates
+from data import (DATA_PATH, build_dataset, dataset_version, investor_deals, load_deals, similar_startups,
+                  startup_deals, startup_profile)
+
+# pandas and SQLite add up amounts in different orders
+RTOL = 1e-6
+DEAL_COLUMNS = sqlstore.DEAL_COLUMNS.split(', ')
+# Entities per filter combination whose filtered detail queries are compared
+FILTERED_SAMPLE = 200
+
+
+def same(expected, actual):
+    if isinstance(expected, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(expected.reset_index(drop=True), actual.reset_index(drop=True),
+                                          check_dtype=False, check_categorical=False, rtol=RTOL)
+        except AssertionError:
+            return False
+        return True
+    if isinstance(expected, dict):
+        return expected.keys() == actual.keys() and all(same(expected[key], actual[key]) for key in expected)
+    if isinstance(expected, pd.Series):
+        return same(expected.to_frame().T, actual.to_frame().T)
+    if isinstance(expected, np.ndarray):
+        if expected.dtype.kind == 'f':
+            return expected.shape == actual.shape and bool(np.allclose(expected, actual, rtol=RTOL))
+        return np.array_equal(expected, actual)
+    if isinstance(expected, (float, np.floating)):
+        return bool(np.isclose(expected, actual, rtol=RTOL, equal_nan=True))
+    return expected == actual
+
+
+def _deals(frame):
+    return frame[DEAL_COLUMNS].astype({column: 'str' for column in sqlstore.TEXT_COLUMNS})
+
+
+def filter_combinations(index):
+    # A date range, the busiest cities, a vertical and rounds, and all of them at once
+    start, end = deal_filters.filter_options(index)['dates']
+    busiest = {column: sorted(values, key=lambda value: -len(values[value]))
+               for column, values in index['values'].items()}
+    combinations = [
+        {'dates': (start, start + (end - start) / 2)},
+        {'city': busiest['city'][:3]},
+        {'vertical': busiest['vertical'][:1], 'round': busiest['round'][:2]},
+    ]
+    combinations.append({key: value for combination in combinations for key, value in combination.items() if value})
+    return [{**deal_filters.NO_FILTERS, **combination} for combination in combinations]
+
+
+def filtered_mismatches(dataset, store):
+    df, profiles, index = dataset['df'], dataset['startup_profiles'], dataset['filter_index']
+    options = deal_filters.filter_options(index)
+    if options != sqlstore.filter_options(store):
+        return ['filter options']
+
+    failures = []
+    for filters in filter_combinations(index):
+        mask = deal_filters.filter_mask(index, filters)
+        if not same(mask, sqlstore.filter_mask(store, filters)):
+            failures.append(f'row mask under {filters}')
+        actual = sqlstore.overall_aggregates(store, filters)
+        # Both pandas paths, whichever filtered_aggregates picks for this size
+        for path, expected in [('cube', cube_aggregates(dataset['cube'], df, index, mask, filters)),
+                               ('rows', row_aggregates(df, mask))]:
+            for key in expected:
+                if not same(expected[key], actual[key]):
+                    failures.append(f'overall aggregate {key!r} ({path}) under {filters}')
+        for name in dataset['investor_names'][:FILTERED_SAMPLE]:
+            if not same(_deals(investor_deals(df, dataset['investor_index'], name, mask)),
+                        sqlstore.investor_deals(store, name, filters)):
+                failures.append(f'investor deals for {name!r} under {filters}')
+        for startup in dataset['startup_names'][:FILTERED_SAMPLE]:
+            if not same(_deals(startup_deals(df, profiles, startup, mask)),
+                        sqlstore.startup_deals(store, startup, filters)):
+                failures.append(f'rounds of {startup!r} under {filters}')
+            vertical = profiles.at[startup, 'vertical']
+            if deal_filters.similar_startups(df, index, mask, vertical, startup) != \
+                    sqlstore.similar_startups(store, vertical, startup, filters=filters):
+                failures.append(f'similar companies of {startup!r} under {filters}')
+    return failures
+
+
+def mismatches(csv_path):
+    dataset = build_dataset(load_deals(csv_path), dataset_version(csv_path))
+    store = sqlstore.open_store(csv_path)
+    df, profiles = dataset['df'], dataset['startup_profiles']
+
+    failures = []
+    aggregates = sqlstore.overall_aggregates(store)
+    for key, expected in dataset['aggregates'].items():
+        if not same(expected, aggregates[key]):
+            failures.append(f'overall aggregate {key!r}')
+    for table in ['startup_aliases', 'investor_aliases']:
+        if not same(dataset[table].reset_index(), getattr(sqlstore, table)(store).reset_index()):
+            failures.append(table.replace('_', ' '))
+    if dataset['investor_names'] != sqlstore.investor_names(store):
+        failures.append('investor names')
+    if dataset['startup_names'] != sqlstore.startup_names(store):
+        failures.append('startup names')
+    graph = sqlstore.coinvestment_graph(store)
+    for key, expected in dataset['coinvestment'].items():
+        if not same(expected, graph[key]):
+            failures.append(f'co-investment graph {key!r}')
+
+    for name in dataset['investor_names']:
+        if not same(_deals(investor_deals(df, dataset['investor_index'], name)), sqlstore.investor_deals(store, name)):
+            failures.append(f'investor deals for {name!r}')
+
+    for startup in dataset['startup_names']:
+        profile = startup_profile(profiles, startup)[['city', 'vertical', 'subvertical']]
+        if not same(profile.astype(object), sqlstore.startup_profile(store, startup)):
+            failures.append(f'profile of {startup!r}')
+        if not same(_deals(startup_deals(df, profiles, startup)), sqlstore.startup_deals(store, startup)):
+            failures.append(f'rounds of {startup!r}')
+        expected = similar_startups(dataset['vertical_index'], profile['vertical'], startup)
+        if expected != sqlstore.similar_startups(store, profile['vertical'], startup):
+            failures.append(f'similar companies of {startup!r}')
+    return failures + filtered_mismatches(dataset, store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the pandas and SQLite backends query by query')
+    parser.add_argument('--csv', default=DATA_PATH, help='cleaned deals CSV (default: the bundled dataset)')
+    args = parser.parse_args()
+
+    failures = mismatches(args.csv)
+    for failure in failures:
+        print(f'MISMATCH {failure}')
+    if failures:
+        sys.exit(1)
+    print('pandas and SQLite backends agree')
+
+
+if __name__ == '__main__':
+    main()
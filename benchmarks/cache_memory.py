@@ -0,0 +1,51 @@
+"""Memory held by per-entity result caches while browsing many investors.
+
+Builds the investor page result (report and figures) for a growing number of distinct investors
+of a synthetic feed, through an unbounded dict (what st.cache_data keeps) and through a bounded
+caching.LRUCache, and prints the bytes each holds. Run from the repository root:
+
+    python -m benchmarks.cache_memory
+    python -m benchmarks.cache_memory --rows 1000000 --investors 5000 --budget-mb 32
+"""
+import argparse
+
+from analytics import investor_report
+from benchmarks.synthetic import synthetic_deals
+from caching import MB, LRUCache, sizeof
+from charts import investor_figures
+from data import add_date_columns, build_investor_index, compact_dtypes, investor_deals
+
+CHECKPOINTS = 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-entity cache memory, unbounded vs LRU')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--investors', type=int, default=2_000)
+    parser.add_argument('--budget-mb', type=float, default=8)
+    args = parser.parse_args()
+
+    df = synthetic_deals(args.rows)
+    add_date_columns(df)
+    df = compact_dtypes(df)
+    index = build_investor_index(df)
+    names = sorted(index, key=lambda name: -len(index[name]))[:args.investors]
+
+    unbounded, unbounded_bytes = {}, 0
+    lru = LRUCache('investor_pages', 'shared', max_entries=len(names), max_bytes=args.budget_mb * MB)
+    print(f"{'investors':>10} {'unbounded MB':>13} {'LRU MB':>8} {'LRU entries':>12} {'evictions':>10}")
+    step = max(1, len(names) // CHECKPOINTS)
+    for viewed, name in enumerate(names, start=1):
+        report = investor_report(investor_deals(df, index, name))
+        page = {'report': report, 'figures': investor_figures(report, name)}
+        unbounded[name] = page
+        unbounded_bytes += sizeof(page)
+        lru.put(name, page)
+        if viewed % step == 0 or viewed == len(names):
+            stats = lru.stats()
+            print(f"{viewed:>10} {unbounded_bytes / MB:>13.1f} {stats['MB']:>8.1f} {stats['entries']:>12} "
+                  f"{stats['evictions']:>10}")
+
+
+if __name__ == '__main__':
+    main()
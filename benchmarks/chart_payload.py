@@ -0,0 +1,73 @@
+"""Plotly payload and build+serialize time before and after top-N bucketing and LTTB downsampling.
+
+Build plus to_json is the server-side part of time-to-first-paint for a chart. Run from the
+repository root:
+
+    python -m benchmarks.chart_payload
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from analytics import investor_report
+from charts import downsample_line, figure_payload_bytes, investor_figures
+from data import build_investor_index, investor_deals, load_deals
+
+DEFAULT_CSV = 'startup_cleaned (1).csv'
+TOP_INVESTORS = 5
+LONG_SERIES_POINTS = [1_000, 10_000, 100_000]
+
+
+def uncapped_investor_figures(investor_data, investor_name):
+    # The investor page's charts as built before bucketing: one bar per startup, one slice per vertical
+    big_series = investor_data.groupby('startup', observed=True)['amount'].sum().sort_values(ascending=False)
+    vertical_series = investor_data.groupby('vertical', observed=True)['amount'].sum()
+    return {
+        'biggest': px.bar(big_series.reset_index(), x='startup', y='amount',
+                          title=f'Biggest Investments by {investor_name}', color='amount'),
+        'sectors': px.pie(vertical_series.reset_index(), names='vertical', values='amount', hole=0.3),
+    }
+
+
+def build_and_serialize(build, *args):
+    start = time.perf_counter()
+    figures = build(*args)
+    payload = sum(figure_payload_bytes(figures[name]) for name in ('biggest', 'sectors'))
+    return payload, time.perf_counter() - start
+
+
+def investor_charts(df):
+    investor_index = build_investor_index(df)
+    prolific = sorted(investor_index, key=lambda name: len(investor_index[name]), reverse=True)[:TOP_INVESTORS]
+    print(f"{'investor':<28} {'deals':>5} {'before KB':>10} {'ms':>6} {'after KB':>9} {'ms':>6}")
+    for name in prolific:
+        investor_data = investor_deals(df, investor_index, name)
+        old_bytes, old_time = build_and_serialize(uncapped_investor_figures, investor_data, name)
+        new_bytes, new_time = build_and_serialize(investor_figures, investor_report(investor_data), name)
+        print(f'{name[:28]:<28} {len(investor_data):>5} {old_bytes / 1024:>10.1f} {old_time * 1e3:>6.0f} '
+              f'{new_bytes / 1024:>9.1f} {new_time * 1e3:>6.0f}')
+
+
+def long_series_charts():
+    rng = np.random.default_rng(0)
+    print(f"\n{'points':>8} {'before KB':>10} {'ms':>6} {'after KB':>9} {'ms':>6}")
+    for n_points in LONG_SERIES_POINTS:
+        series = pd.DataFrame({'x_axis': np.arange(n_points), 'amount': rng.lognormal(3, 1, n_points).cumsum()})
+        results = []
+        for frame in (lambda: series, lambda: downsample_line(series, 'amount')):
+            start = time.perf_counter()
+            payload = figure_payload_bytes(px.line(frame(), x='x_axis', y='amount', markers=True))
+            results.append((payload, time.perf_counter() - start))
+        (old_bytes, old_time), (new_bytes, new_time) = results
+        print(f'{n_points:>8} {old_bytes / 1024:>10.1f} {old_time * 1e3:>6.0f} {new_bytes / 1024:>9.1f} {new_time * 1e3:>6.0f}')
+
+
+def main():
+    investor_charts(load_deals(DEFAULT_CSV))
+    long_series_charts()
+
+
+if __name__ == '__main__':
+    main()
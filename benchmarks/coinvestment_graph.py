@@ -0,0 +1,76 @@
+"""Co-investment graph: build time and neighbour query latency as the feed grows.
+
+Builds the dataset of synthetic feeds, then times build_graph alone and the investor page's
+queries for the busiest investor and a sample of others: the top co-investors (a CSR slice), the
+same under a one-year filter mask, the full table with shared portfolio companies, unfiltered and
+filtered, and the filtered table again as the pages get it on a repeat visit, from the shared
+cache of service.co_investors. Run from the repository root:
+
+    python -m benchmarks.coinvestment_graph
+    python -m benchmarks.coinvestment_graph --sizes 1000000
+"""
+import argparse
+import datetime
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_deals
+from data import build_dataset, clean_deals
+from filters import NO_FILTERS
+from graph import build_graph, co_investor_table, co_investors, entity_names, incidence
+import service
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+SAMPLE = 200
+
+
+def _latency_us(query, investors):
+    # Median and worst time per call over the sampled investors
+    times = []
+    for investor in investors:
+        start = time.perf_counter()
+        query(investor)
+        times.append(time.perf_counter() - start)
+    return np.median(times) * 1e6, max(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Co-investment graph build and query timings')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    columns = ['top', 'filtered', 'table', 'filtered table', 'cached']
+    widths = [len(f'{column} p50/max us') + 1 for column in columns]
+    print(f"{'deals':>10} {'investors':>10} {'edges':>10} {'build s':>8} "
+          + ' '.join(f'{f"{column} p50/max us":>{width}}' for column, width in zip(columns, widths)))
+    for n_rows in args.sizes:
+        dataset = build_dataset(clean_deals(synthetic_deals(n_rows))[0], f'benchmark-{n_rows}')
+        df, aliases = dataset['df'], dataset['investor_aliases']
+        start = time.perf_counter()
+        graph = build_graph(*incidence(dataset['investor_index'], aliases), df['amount'].to_numpy(),
+                            df['startup_id'].to_numpy(), entity_names(aliases),
+                            entity_names(dataset['startup_aliases']))
+        build = time.perf_counter() - start
+
+        degrees = np.diff(graph['neighbor_indptr'])
+        rng = np.random.default_rng(0)
+        investors = np.concatenate([[degrees.argmax()], rng.choice(len(degrees), SAMPLE, replace=False)])
+        year = int(df['year'].max())
+        filters = {**NO_FILTERS, 'dates': (datetime.date(year, 1, 1), datetime.date(year, 12, 31))}
+        mask = service.filter_mask(dataset, filters)
+        names = graph['investor_names']
+        for investor in investors:
+            service.co_investors(dataset, names[investor], filters, mask)
+        timings = [_latency_us(lambda investor: co_investors(graph, investor), investors),
+                   _latency_us(lambda investor: co_investors(graph, investor, mask=mask), investors),
+                   _latency_us(lambda investor: co_investor_table(graph, investor), investors),
+                   _latency_us(lambda investor: co_investor_table(graph, investor, mask=mask), investors),
+                   _latency_us(lambda investor: service.co_investors(dataset, names[investor], filters, mask),
+                               investors)]
+        print(f'{n_rows:>10} {len(degrees):>10} {len(graph["neighbor_ids"]) // 2:>10} {build:>8.2f} '
+              + ' '.join(f'{f"{p50:.0f}/{worst:.0f}":>{width}}' for (p50, worst), width in zip(timings, widths)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""Headless timing and peak memory of each dashboard page's data work on synthetic deal tables.
+
+The page logic lives in plain functions (data.py, analytics.py, charts.py), so each stage is
+timed by calling them directly, without a Streamlit runtime. Run from the repository root:
+
+    python -m benchmarks.dashboard                        # 10k, 100k, 1M rows
+    python -m benchmarks.dashboard --sizes 10000 10000000
+    python -m benchmarks.dashboard --check --runs 3       # exit 1 on regression vs baseline
+    python -m benchmarks.dashboard --update-baseline --runs 3
+
+Each stage is timed on its first call, which pays for anything built lazily on first use, and
+short stages are run again and their fastest run kept as well. One more run under tracemalloc
+gives the peak memory, which covers Python and numpy allocations but not Arrow buffers. With
+--runs, each size is benchmarked that many times and the median of every figure is kept, so a
+baseline isn't moved by one slow or fast run of the machine. A fixed calibration workload is
+timed with every size, and --check scales the baseline's times by how it compares, so the
+baseline can be checked on a machine other than the one that recorded it. The filtered Overall
+aggregates are also timed from the cube and from the rows alone, which shows where the cube
+starts to pay off (cube.CUBE_MIN_ROWS).
+
+The 10M tier is opt-in (--sizes 10000000): a 1M run peaks at about 1.9 GB resident, so 10M
+needs a machine with well over 16 GB.
+"""
+import argparse
+import gc
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics import investor_report, overall_aggregates, startup_report
+from benchmarks.synthetic import synthetic_deals
+from charts import investor_figures, overall_figures
+from data import (build_investor_index, build_startup_profiles, build_vertical_index, investor_deals, load_deals,
+                  read_clean_csv, similar_startups, split_investors, startup_deals)
+from cube import build_cube, cube_aggregates, filtered_aggregates, row_aggregates
+from entities import INVESTOR_WORDS, LEGAL_WORDS, alias_counts, resolve_aliases
+from filters import build_filter_index, filter_mask, filter_options
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+# Allowed slowdown / memory growth over the baseline before --check fails
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+# ...and by at least this much, as a few-millisecond stage moves by more than half between runs
+TIME_FLOOR = 0.005
+MEMORY_FLOOR_MB = 1.0
+# Stages are re-run until REPEATS runs or REPEAT_SECONDS of them: one run of a 0.1 s stage
+# swings by half with garbage collection and scheduling
+REPEATS = 5
+REPEAT_SECONDS = 1.0
+# Rows of the fixed calibration workload
+CALIBRATION_ROWS = 1_000_000
+
+
+def measure(func, *args):
+    # Timed and traced in separate calls: tracemalloc slows allocation-heavy code several-fold.
+    # Garbage left by earlier stages is collected first so its cleanup isn't billed to this one
+    times = []
+    while not times or (len(times) < REPEATS and sum(times) < REPEAT_SECONDS):
+        gc.collect()
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, {'seconds': min(times), 'first_seconds': times[0], 'peak_mb': peak / 2 ** 20}
+
+
+def resolve_entities(df):
+    return (resolve_aliases(alias_counts(df['startup']), LEGAL_WORDS),
+            resolve_aliases(alias_counts(split_investors(df['investors'])), INVESTOR_WORDS, people=True))
+
+
+def build_indexes(df):
+    return build_investor_index(df), build_startup_profiles(df), build_vertical_index(df)
+
+
+def overall_page(df):
+    return overall_figures(overall_aggregates(df))
+
+
+def investor_page(df, investor_index, investor_name):
+    return investor_figures(investor_report(investor_deals(df, investor_index, investor_name)), investor_name)
+
+
+def startup_page(df, profiles, vertical_index, startup):
+    profile = profiles.loc[startup]
+    similar = similar_startups(vertical_index, profile['vertical'], startup)
+    return startup_report(profile, startup_deals(df, profiles, startup), similar)
+
+
+def sidebar_filter(index, filters):
+    # A filter change: the combined row mask and the rows it selects
+    mask = filter_mask(index, filters)
+    return mask, int(mask.sum())
+
+
+def filtered_overall_page(cube, df, filter_index, mask, filters):
+    return overall_figures(filtered_aggregates(cube, df, filter_index, mask, filters))
+
+
+def calibration_frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'key': rng.integers(0, 10_000, CALIBRATION_ROWS), 'amount': rng.random(CALIBRATION_ROWS)})
+
+
+def calibration(frame):
+    # The same pandas work on every machine and run: how fast this one is going right now
+    return frame.groupby('key')['amount'].sum().sort_values()
+
+
+def run_size(n_rows, workdir):
+    csv_path = Path(workdir) / f'deals_{n_rows}.csv'
+    synthetic_deals(n_rows).to_csv(csv_path, index=False)
+
+    stages = {}
+    _, stages['calibration'] = measure(calibration, calibration_frame())
+    df, stages['load_csv'] = measure(read_clean_csv, csv_path)
+    load_deals(csv_path)  # writes the snapshot
+    df, stages['load_snapshot'] = measure(load_deals, csv_path)
+    _, stages['entities'] = measure(resolve_entities, df)
+    (investor_index, profiles, vertical_index), stages['indexes'] = measure(build_indexes, df)
+    _, stages['overall'] = measure(overall_page, df)
+
+    # The busiest entities are the worst case for each detail page
+    investor = max(investor_index, key=lambda name: len(investor_index[name]))
+    startup = profiles['deals'].map(len).idxmax()
+    _, stages['investor'] = measure(investor_page, df, investor_index, investor)
+    _, stages['startup'] = measure(startup_page, df, profiles, vertical_index, startup)
+
+    filter_index, stages['filter_index'] = measure(build_filter_index, df)
+    # The first half of the date span in the two busiest cities
+    start, end = filter_options(filter_index)['dates']
+    cities = sorted(filter_index['values']['city'], key=lambda city: -len(filter_index['values']['city'][city]))
+    filters = {'dates': (start, start + (end - start) / 2), 'city': cities[:2], 'vertical': [], 'round': []}
+    (mask, _), stages['filter'] = measure(sidebar_filter, filter_index, filters)
+    cube, stages['cube'] = measure(build_cube, df)
+    _, stages['filtered_overall'] = measure(filtered_overall_page, cube, df, filter_index, mask, filters)
+    # The two ways filtered_overall can aggregate, whose crossover sets cube.CUBE_MIN_ROWS
+    _, stages['filtered_cube'] = measure(cube_aggregates, cube, df, filter_index, mask, filters)
+    _, stages['filtered_rows'] = measure(row_aggregates, df, mask)
+    return stages
+
+
+def median_stages(runs):
+    # Every figure of every stage, the median over the runs of one size
+    return {stage: {key: statistics.median(run[stage][key] for run in runs) for key in stats}
+            for stage, stats in runs[0].items()}
+
+
+def regressions(results, baseline):
+    failures = []
+    for size, stages in results.items():
+        # Baseline times are scaled by how much slower or faster the calibration ran than when
+        # they were recorded, so a busy or different machine doesn't fail every stage
+        recorded = baseline.get(size, {}).get('calibration')
+        speed = stages['calibration']['seconds'] / recorded['seconds'] if recorded else 1.0
+        for stage, current in stages.items():
+            reference = baseline.get(size, {}).get(stage)
+            if reference is None or stage == 'calibration':
+                continue
+            for timing in ('seconds', 'first_seconds'):
+                if timing not in reference:
+                    continue
+                expected = reference[timing] * speed
+                if current[timing] > max(expected * (1 + TIME_TOLERANCE), expected + TIME_FLOOR):
+                    failures.append(f"{stage} @ {size} rows: {timing} {current[timing]:.3f} vs baseline "
+                                    f"{reference[timing]:.3f} (x{speed:.2f} for this machine)")
+            if current['peak_mb'] > max(reference['peak_mb'] * (1 + MEMORY_TOLERANCE),
+                                        reference['peak_mb'] + MEMORY_FLOOR_MB):
+                failures.append(f"{stage} @ {size} rows: {current['peak_mb']:.1f} MB vs baseline {reference['peak_mb']:.1f} MB")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard data-path benchmarks on synthetic deals')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--check', action='store_true', help='fail if any stage regressed against the baseline')
+    parser.add_argument('--update-baseline', action='store_true', help=f'write results to {BASELINE_PATH.name}')
+    parser.add_argument('--runs', type=int, default=1, help='benchmark each size this many times, keeping medians')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'rows':>10} {'stage':<16} {'seconds':>9} {'first s':>9} {'peak MB':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in args.sizes:
+            results[str(n_rows)] = median_stages([run_size(n_rows, workdir) for _ in range(args.runs)])
+            for stage, stats in results[str(n_rows)].items():
+                print(f"{n_rows:>10} {stage:<16} {stats['seconds']:>9.3f} {stats['first_seconds']:>9.3f} "
+                      f"{stats['peak_mb']:>9.1f}")
+
+    if args.update_baseline:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        print(f'Baseline written to {BASELINE_PATH}')
+
+    if args.check:
+        failures = regressions(results, json.loads(BASELINE_PATH.read_text()))
+        for failure in failures:
+            print(f'REGRESSION {failure}')
+        if failures:
+            sys.exit(1)
+        print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
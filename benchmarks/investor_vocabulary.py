@@ -0,0 +1,48 @@
+"""Investor selectbox vocabulary: Series.sum() concatenation vs the investor index's names.
+
+The pages list the names of data.build_investor_index, which is built once per dataset version.
+
+Run from the repository root:
+
+    python -m benchmarks.investor_vocabulary
+"""
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_investors
+from data import build_investor_index
+
+SIZES = [3_000, 10_000, 100_000, 1_000_000]
+# The list-concatenation baseline is quadratic; at 100k rows it already takes ~2 minutes
+SUM_BASELINE_LIMIT = 10_000
+
+
+def sum_baseline(investors):
+    return sorted(set(investors.str.split(',').sum()))
+
+
+def index_names(investors):
+    # What the dataset's 'investor_names' is: the index's keys, which are sorted
+    return list(build_investor_index(pd.DataFrame({'investors': investors})))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    print(f"{'rows':>10} {'sum() s':>10} {'index s':>10} {'us/row':>8} {'names':>7}")
+    for n_rows in SIZES:
+        investors = synthetic_investors(n_rows)
+        baseline = '-'
+        if n_rows <= SUM_BASELINE_LIMIT:
+            baseline = f'{timed(sum_baseline, investors)[0]:.3f}'
+        elapsed, names = timed(index_names, investors)
+        print(f'{n_rows:>10} {baseline:>10} {elapsed:>10.3f} {elapsed / n_rows * 1e6:>8.2f} {len(names):>7}')
+
+
+if __name__ == '__main__':
+    main()
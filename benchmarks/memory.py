@@ -0,0 +1,26 @@
+"""Memory footprint of the loaded dataset before and after compact_dtypes.
+
+Run from the repository root:
+
+    python -m benchmarks.memory ["startup_cleaned (1).csv"]
+"""
+import sys
+
+import pandas as pd
+
+from data import add_date_columns, compact_dtypes, memory_report
+
+DEFAULT_CSV = 'startup_cleaned (1).csv'
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_CSV
+    before = pd.read_csv(csv_path)
+    add_date_columns(before)
+    after = compact_dtypes(before.copy())
+    with pd.option_context('display.width', 120):
+        print(memory_report(before, after).to_string(float_format='{:.1f}'.format))
+
+
+if __name__ == '__main__':
+    main()
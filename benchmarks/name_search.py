@@ -0,0 +1,46 @@
+"""Name search index: build time, query latency and options sent vs a full selectbox.
+
+Builds the index over the investor names (data.build_investor_index) of synthetic feeds and
+times prefix, typo and no-match queries. Run from the repository root:
+
+    python -m benchmarks.name_search
+    python -m benchmarks.name_search --sizes 1000000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_investors
+from data import build_investor_index
+from search import build_name_index, search_names
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+QUERIES = ['Investor 12', 'Invsetor 4711', 'nobody']
+REPEATS = 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Name search build and query timings')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    args = parser.parse_args()
+
+    print(f"{'deals':>10} {'names':>9} {'build s':>8} " + ' '.join(f'{query[:12]:>13}' for query in QUERIES))
+    for n_rows in args.sizes:
+        investors = synthetic_investors(n_rows, n_investors=max(100, int(n_rows * 1.1)))
+        names = list(build_investor_index(pd.DataFrame({'investors': investors})))
+        start = time.perf_counter()
+        index = build_name_index(names)
+        build = time.perf_counter() - start
+
+        latencies = []
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(REPEATS):
+                search_names(index, query)
+            latencies.append((time.perf_counter() - start) / REPEATS * 1e3)
+        print(f'{n_rows:>10} {len(names):>9} {build:>8.2f} ' + ' '.join(f'{ms:>10.2f} ms' for ms in latencies))
+
+
+if __name__ == '__main__':
+    main()
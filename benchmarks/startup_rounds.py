@@ -0,0 +1,59 @@
+"""Render cost of a startup's funding rounds: one st.write per field vs one st.dataframe.
+
+Renders both variants headless with Streamlit's AppTest for the startups with the most
+rounds and reports elements (one delta each) and render time; the times include AppTest's
+fixed per-run overhead, so the element count is the figure to compare. Run from the
+repository root:
+
+    python -m benchmarks.startup_rounds
+"""
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from data import load_deals
+
+DEFAULT_CSV = 'startup_cleaned (1).csv'
+TOP_STARTUPS = 5
+
+
+def per_round_writes(rounds):
+    import streamlit as st
+
+    for i in range(len(rounds)):
+        st.write(f"**Date:** {rounds.loc[i]['date']}")
+        st.write(f"**Investors:** {rounds.loc[i]['investors']}")
+        st.write(f"**Round:** {rounds.loc[i]['round']}")
+        st.markdown("---")
+
+
+def single_table(deals):
+    import streamlit as st
+
+    from analytics import funding_rounds_table
+
+    st.dataframe(funding_rounds_table(deals), hide_index=True)
+
+
+def render(script, frame):
+    at = AppTest.from_function(script, args=(frame,), default_timeout=60)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    return len(list(at.main)), elapsed
+
+
+def main():
+    df = load_deals(DEFAULT_CSV)
+    top = df['startup'].value_counts().head(TOP_STARTUPS).index
+    print(f"{'startup':<20} {'rounds':>6} {'writes':>7} {'ms':>7} {'table':>6} {'ms':>7}")
+    for startup in top:
+        deals = df[df['startup'] == startup]
+        old_elements, old_time = render(per_round_writes, deals[['date', 'investors', 'round']].reset_index())
+        new_elements, new_time = render(single_table, deals)
+        print(f'{startup:<20} {len(deals):>6} {old_elements:>7} {old_time * 1e3:>7.1f} '
+              f'{new_elements:>6} {new_time * 1e3:>7.1f}')
+
+
+if __name__ == '__main__':
+    main()
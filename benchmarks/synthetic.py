@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_investors(n_rows, n_investors=5000, max_syndicate=4, seed=0):
+    """Comma-separated investor syndicates, one per deal, with the feed's stray leading spaces."""
+    rng = np.random.default_rng(seed)
+    pool = np.array([f'Investor {i}' for i in range(n_investors)], dtype=object)
+    sizes = rng.integers(1, max_syndicate + 1, size=n_rows)
+    # Zipf-distributed picks so a few investors appear in most deals, like the real feed
+    names = pool[rng.zipf(1.3, size=sizes.sum()) % n_investors]
+    names = np.where(rng.random(len(names)) < 0.3, ' ' + names, names)
+    return pd.Series([','.join(group) for group in np.split(names, np.cumsum(sizes)[:-1])])
+
+
+def _names(prefix, n):
+    return np.array([f'{prefix} {i}' for i in range(n)], dtype=object)
+
+
+def synthetic_deals(n_rows, seed=0):
+    """A deal table in the cleaned CSV schema with the bundled dataset's shape at n_rows.
+
+    The bundled file has ~0.8 startups and ~1.1 investors per deal, ~100 cities, a long
+    tail of verticals dominated by a few, ~50 round labels and heavy-tailed amounts with
+    about a third undisclosed (0).
+    """
+    rng = np.random.default_rng(seed)
+    startups = _names('Startup', max(1, int(n_rows * 0.8)))
+    verticals = _names('Vertical', max(10, min(int(n_rows * 0.3), 20_000)))
+    cities = _names('City', 100)
+    rounds = _names('Round', 50)
+
+    days = rng.integers(0, 10 * 365, size=n_rows)
+    dates = (np.datetime64('2015-01-01') + days.astype('timedelta64[D]')).astype(str)
+    amounts = np.where(rng.random(n_rows) < 0.33, 0.0, rng.lognormal(2, 2, n_rows).round(2))
+
+    return pd.DataFrame({
+        'date': dates,
+        'startup': startups[rng.integers(0, len(startups), n_rows)],
+        'vertical': verticals[rng.zipf(1.5, n_rows) % len(verticals)],
+        'subvertical': np.where(rng.random(n_rows) < 0.25, None, 'Subvertical'),
+        'city': cities[rng.zipf(1.8, n_rows) % len(cities)],
+        'investors': synthetic_investors(n_rows, n_investors=max(100, int(n_rows * 1.1)), seed=seed),
+        'round': rounds[rng.zipf(1.6, n_rows) % len(rounds)],
+        'amount': amounts,
+    })
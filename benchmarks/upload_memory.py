@@ -0,0 +1,63 @@
+"""Peak memory of cleaning an uploaded deals file whole vs in chunks.
+
+Writes a synthetic feed to a CSV (optionally with a free-text column outside the schema, as user
+files often have) and cleans it in a fresh process each way: clean_deals(pd.read_csv(file)) and
+clean_deals_chunked(file). Prints the time and the growth of the process's peak resident memory,
+which unlike tracemalloc also covers Arrow string buffers. Run from the repository root:
+
+    python -m benchmarks.upload_memory
+    python -m benchmarks.upload_memory --rows 2000000 --notes
+"""
+import argparse
+import io
+import resource
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_deals
+from data import clean_deals, clean_deals_chunked
+
+MODES = {
+    'whole': lambda file: clean_deals(pd.read_csv(file))[0],
+    'chunked': lambda file: clean_deals_chunked(file)[0],
+}
+
+
+def measure(mode, path):
+    # Runs in a fresh worker process; the file is read into memory first, as an upload arrives
+    payload = Path(path).read_bytes()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    deals = MODES[mode](io.BytesIO(payload))
+    elapsed = time.perf_counter() - start
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+    return elapsed, peak, deals.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Upload cleaning memory, whole file vs chunks')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--notes', action='store_true', help='add a free-text column outside the schema')
+    args = parser.parse_args()
+
+    deals = synthetic_deals(args.rows)
+    if args.notes:
+        deals['notes'] = 'Follow-on round; terms not disclosed. ' + deals['startup']
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'upload.csv'
+        deals.to_csv(path, index=False)
+        del deals
+        print(f'{args.rows} rows, {path.stat().st_size / 2 ** 20:.0f} MB of CSV')
+        print(f"{'mode':>8} {'seconds':>8} {'peak MB':>8} {'deals MB':>9}")
+        for mode in MODES:
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                elapsed, peak, size = pool.submit(measure, mode, str(path)).result()
+            print(f'{mode:>8} {elapsed:>8.2f} {peak:>8.0f} {size:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
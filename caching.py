@@ -0,0 +1,216 @@
+"""Result caches with an explicit scope, bounded memory and hit/miss counters.
+
+The served dataset is one shared, read-only object per process (data.current_dataset, held by
+st.cache_resource), handed to every session without copying. Results derived from it per entity
+or per filter combination go through the bounded LRU caches here instead of st.cache_data, which
+keeps every distinct input forever and copies each value out on every hit:
+
+- shared caches (shared_cache) live once per server process and serve every session;
+- session caches (session_cache) live in st.session_state and go away with the session, so they
+  can only be used from the script thread.
+
+Each cache evicts its least recently used entries beyond max_entries or max_bytes (None: values
+are not sized and only their number is bounded), drops entries older than ttl seconds, and counts hits, misses, evictions and expiries. Concurrent misses on the
+same key are computed once (counted as joined). Cached values are shared
+between callers, so they must be treated as read-only. As with Streamlit's decorators, arguments
+whose name starts with an underscore are not part of the key.
+"""
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from charts import figure_payload_bytes
+
+MB = 2 ** 20
+
+
+def sizeof(value):
+    """Approximate bytes held by a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(key) + sizeof(item) for key, item in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(sizeof(item) for item in value)
+    if hasattr(value, 'to_plotly_json'):
+        return figure_payload_bytes(value)
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    # Hashable key from lists and dicts such as the sidebar filters
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class LRUCache:
+    def __init__(self, name, scope, max_entries, max_bytes, ttl=None):
+        self.name, self.scope = name, scope
+        self.max_entries, self.max_bytes, self.ttl = max_entries, max_bytes, ttl
+        self._entries = OrderedDict()  # key -> (value, bytes, stored at)
+        self._pending = {}  # key -> Future of the computation in flight
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.counts = {'hits': 0, 'misses': 0, 'joined': 0, 'evictions': 0, 'expired': 0}
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[2] > self.ttl:
+                self._drop(key)
+                self.counts['expired'] += 1
+                entry = None
+            if entry is None:
+                self.counts['misses'] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.counts['hits'] += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = 0 if self.max_bytes is None else sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Larger than the whole budget: serve it, don't keep it
+                return
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None
+                                                            and self._bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.counts['evictions'] += 1
+
+    def get_or_compute(self, key, compute):
+        """The cached value for key, or compute() stored under it.
+
+        Concurrent misses on one key share a single computation: the first caller computes, the
+        others wait for its result. Computing happens outside the lock, so a slow entry never
+        blocks hits on other keys.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        with self._lock:
+            pending = self._pending.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._pending[key] = Future()
+            else:
+                self.counts['joined'] += 1
+        if not owner:
+            return pending.result()
+        try:
+            value = compute()
+        except BaseException as exc:
+            pending.set_exception(exc)
+            raise
+        else:
+            self.put(key, value)
+            pending.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counts['hits'] + self.counts['misses']
+            return {'cache': self.name, 'scope': self.scope, 'entries': len(self._entries),
+                    'MB': None if self.max_bytes is None else round(self._bytes / MB, 2), **self.counts,
+                    'hit_rate': round(self.counts['hits'] / lookups, 3) if lookups else None}
+
+
+# One registry per server process, like profiling's counters; plain module state rather than
+# st.cache_resource so section workers without a script context (background.py) can use it
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _shared_caches():
+    return _shared
+
+
+def _session_caches():
+    return st.session_state.setdefault('result_caches', {})
+
+
+def _registered(registry, scope, name, max_entries, max_bytes, ttl):
+    caches = registry()
+    cache = caches.get(name)
+    if cache is None:
+        with _shared_lock:
+            cache = caches.setdefault(name, LRUCache(name, scope, max_entries, max_bytes, ttl))
+    return cache
+
+
+def _decorator(registry, scope, name, max_entries, max_bytes, ttl):
+    def decorate(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = _freeze([value for arg, value in bound.arguments.items() if not arg.startswith('_')])
+            cache = _registered(registry, scope, name, max_entries, max_bytes, ttl)
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+        return wrapper
+
+    return decorate
+
+
+def shared_cache(name, max_entries, max_bytes, ttl=None):
+    """Cache func's results process-wide, for every session, in a bounded LRU named name."""
+    return _decorator(_shared_caches, 'shared', name, max_entries, max_bytes, ttl)
+
+
+def shared_lru(name, max_entries, max_bytes, ttl=None):
+    """The process-wide LRUCache named name, for values that aren't the result of one function call."""
+    return _registered(_shared_caches, 'shared', name, max_entries, max_bytes, ttl)
+
+
+def session_cache(name, max_entries, max_bytes, ttl=None):
+    """Cache func's results for the current session only, in a bounded LRU named name."""
+    return _decorator(_session_caches, 'session', name, max_entries, max_bytes, ttl)
+
+
+def cache_stats():
+    """One row per shared cache and per cache of the current session."""
+    caches = list(_shared_caches().values()) + list(_session_caches().values())
+    return pd.DataFrame([cache.stats() for cache in caches])
+
+
+def render_stats():
+    with st.sidebar.expander('🗄️ Result Caches'):
+        stats = cache_stats()
+        if stats.empty:
+            st.write('Nothing cached yet.')
+            return
+        st.dataframe(stats, hide_index=True)
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+# Bars/slices shown individually before the rest are folded into "Others"
+TOP_STARTUPS = 15
+TOP_VERTICALS = 10
+OTHERS_LABEL = 'Others'
+# Line charts longer than this are downsampled with LTTB before they are sent to the browser
+MAX_LINE_POINTS = 500
+
+
+def top_n_with_others(frame, label, value, n):
+    """Keep the n largest rows by value and sum the rest into a single "Others" row."""
+    frame = frame.sort_values(value, ascending=False)
+    if len(frame) <= n + 1:
+        return frame.reset_index(drop=True)
+    others = pd.DataFrame({label: [OTHERS_LABEL], value: [frame[value].iloc[n:].sum()]})
+    top = frame.head(n)[[label, value]].astype({label: 'object'})
+    return pd.concat([top, others], ignore_index=True)
+
+
+def lttb(x, y, n_out):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps when reducing a series to n_out points."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # First and last points are always kept; the n - 2 points between them form n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the previously kept point, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_line(frame, y, n_out=MAX_LINE_POINTS):
+    # x positions rather than labels, so string axes such as "1-2015" downsample too
+    if len(frame) <= n_out:
+        return frame
+    return frame.iloc[lttb(np.arange(len(frame)), frame[y].to_numpy(), n_out)]
+
+
+def figure_payload_bytes(fig):
+    # Size of the spec st.plotly_chart ships to the browser
+    return len(fig.to_json())
+
+
+def month_over_month_figure(series, selected_option):
+    return px.line(downsample_line(series, 'amount'), x='x_axis', y='amount',
+                   title=f'{selected_option} Funding Amount by Month and Year',
+                   labels={'x_axis': 'Month-Year', 'amount': f'{selected_option} Amount'},
+                   markers=True)
+
+
+def city_counts_figure(city_counts):
+    return px.bar(city_counts, x='City', y='Investment Count',
+                  title='Investment Count by City',
+                  labels={'City': 'City', 'Investment Count': 'Count'},
+                  color='Investment Count',
+                  color_continuous_scale='Blues')
+
+
+def top_investors_figure(top_investor):
+    return px.bar(top_investor,
+                  x='investors',
+                  y='amount',
+                  title='Top 5 Investors by Funding Amount',
+                  labels={'amount': 'Total Investment Amount', 'investors': 'Investors'},
+                  color='amount',
+                  color_continuous_scale='Viridis')
+
+
+def overall_figures(aggregates):
+    """Every Overall Analysis chart, with both month-over-month variants."""
+    return {
+        'month_over_month': {option: month_over_month_figure(series, option)
+                             for option, series in aggregates['month_over_month'].items()},
+        'city_counts': city_counts_figure(aggregates['city_counts']),
+        'top_investors': top_investors_figure(aggregates['top_investors']),
+    }
+
+
+def biggest_investments_figure(startup_totals, investor_name):
+    big_series = top_n_with_others(startup_totals, 'startup', 'amount', TOP_STARTUPS)
+    return px.bar(big_series, x='startup', y='amount',
+                  title=f'Biggest Investments by {investor_name}',
+                  labels={'startup': 'Startup', 'amount': 'Total Investment'},
+                  color='amount', color_continuous_scale='Blues')
+
+
+def sectors_figure(vertical_totals, investor_name):
+    vertical_series = top_n_with_others(vertical_totals, 'vertical', 'amount', TOP_VERTICALS)
+    return px.pie(vertical_series, names='vertical', values='amount',
+                  title='Investment Distribution by Sector', hole=0.3)
+
+
+def yearly_investment_figure(yearly, investor_name):
+    return px.line(downsample_line(yearly, 'amount'), x='year', y='amount',
+                   title='Year Over Year Investment',
+                   labels={'year': 'Year', 'amount': 'Total Investment'},
+                   markers=True)
+
+
+# Investor page charts: name -> (analytics.INVESTOR_TOTALS table, builder), in page order
+INVESTOR_CHARTS = {
+    'biggest': ('startup_totals', biggest_investments_figure),
+    'sectors': ('vertical_totals', sectors_figure),
+    'yearly': ('yearly', yearly_investment_figure),
+}
+
+
+def investor_figures(report, investor_name):
+    """The investor page's charts from its investor_report; startup bars and sector slices get an "Others" bucket."""
+    return {name: build(report[table], investor_name) for name, (table, build) in INVESTOR_CHARTS.items()}
@@ -0,0 +1,629 @@
+import bisect
+import glob
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import merge_partials, overall_partials, summarize_overall
+from caching import shared_lru
+from cube import build_cube, extend_cube
+from entities import INVESTOR_WORDS, LEGAL_WORDS, alias_counts, canonicalize, resolve_aliases
+from filters import build_filter_index, extend_filter_index, restrict
+from graph import build_graph, entity_names, extend_graph, incidence
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshots are an optimisation; without pyarrow we always parse the CSV
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# The dataset every entry point (app.py, simple.py, enhanced_app.py) works on
+DATA_PATH = Path(__file__).resolve().parent / 'startup_cleaned (1).csv'
+
+# Bump whenever the cleaning rules change so existing snapshots are rebuilt
+SNAPSHOT_VERSION = 5
+
+# Formats seen in the feed, tried in order; each pass only parses rows the previous ones missed
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y']
+
+# The cleaned schema; every column but subvertical must be filled in
+CLEAN_COLUMNS = ['date', 'startup', 'vertical', 'subvertical', 'city', 'investors', 'round', 'amount']
+REQUIRED_COLUMNS = ['date', 'startup', 'vertical', 'city', 'investors', 'round', 'amount']
+
+# Rows read at a time from an uploaded file
+UPLOAD_CHUNK_SIZE = 100_000
+# Uploaded datasets kept in memory, for every session that analyzes them
+UPLOADS_KEPT = 2
+
+# Low-cardinality text columns that every page groups or filters on
+CATEGORY_COLUMNS = ['startup', 'vertical', 'subvertical', 'city', 'investors', 'round']
+
+
+def normalize_dates(dates):
+    """Repair and parse a date column in bulk; returns (parsed, raw values that failed to parse)."""
+    text = dates.astype('string').str.strip()
+    # Stray non-breaking space from the export, sometimes written out as a literal escape
+    text = text.str.replace(r'^(?:(?:\\+xc2\\+xa0)|\xa0)+', '', regex=True)
+    text = text.str.replace(r'\.|/{2,}', '/', regex=True)
+    # Missing separator between month and year: 05/072018
+    text = text.str.replace(r'^(\d{1,2})/(\d{2})(\d{4})$', r'\1/\2/\3', regex=True)
+    # Three-digit years are 20xx with the leading 2 dropped: 01/07/015
+    text = text.str.replace(r'^(\d{1,2}/\d{1,2}/)(\d{3})$', r'\g<1>2\2', regex=True)
+
+    parsed = pd.Series(pd.NaT, index=dates.index, dtype='datetime64[ns]')
+    for fmt in DATE_FORMATS:
+        missing = parsed.isna() & text.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=fmt, errors='coerce')
+
+    invalid = dates[parsed.isna() & dates.notna()]
+    return parsed, invalid
+
+
+def add_date_columns(df):
+    # Parse 'date' in place and derive year/month; unparseable rows stay as NaT but are reported
+    df['date'], invalid = normalize_dates(df['date'])
+    if not invalid.empty:
+        logger.warning('%d rows have unparseable dates, e.g. %s', len(invalid), invalid.head(5).tolist())
+    df['year'] = df['date'].dt.year
+    df['month'] = df['date'].dt.month
+    return invalid
+
+
+def _downcast_int(series, dtype):
+    # Plain numpy ints when there are no missing dates, nullable ones otherwise
+    if series.isna().any():
+        return series.astype(dtype.capitalize())
+    return series.astype(dtype)
+
+
+def compact_dtypes(df):
+    """Categorical text columns and int16/int8 year/month.
+
+    Amounts stay float64: float32 keeps only about 7 significant digits, so 123.456789 would
+    come back as 123.45679 on the pages, in the API and in appended CSV rows.
+    """
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+    df['year'] = _downcast_int(df['year'], 'int16')
+    df['month'] = _downcast_int(df['month'], 'int8')
+    return df
+
+
+def memory_report(before, after):
+    """Per-column deep memory usage of two versions of the same frame, in bytes."""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(deep=True, index=False),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': after.memory_usage(deep=True, index=False),
+    })
+    report.loc['total', ['bytes_before', 'bytes_after']] = report[['bytes_before', 'bytes_after']].sum()
+    report['saved_pct'] = (1 - report['bytes_after'] / report['bytes_before']) * 100
+    return report
+
+
+def read_clean_csv(csv_path):
+    df = pd.read_csv(csv_path)
+    add_date_columns(df)
+    return compact_dtypes(df)
+
+
+def _clean(raw):
+    missing = set(CLEAN_COLUMNS) - set(raw.columns)
+    if missing:
+        raise ValueError(f'Missing columns: {sorted(missing)}')
+    df = raw[CLEAN_COLUMNS].copy()
+    df['amount'] = pd.to_numeric(df['amount'], errors='coerce')
+    add_date_columns(df)
+
+    bad = df[REQUIRED_COLUMNS].isna().any(axis=1).to_numpy()
+    return df[~bad].reset_index(drop=True), raw[bad]
+
+
+def clean_deals(raw):
+    """Validate a batch of deals in the cleaned schema and clean it like read_clean_csv.
+
+    Returns (deals, rejected): rows with an unparseable date or amount, or a missing required
+    field, are left out of deals and returned as they were given.
+    """
+    df, rejected = _clean(raw)
+    return compact_dtypes(df), rejected
+
+
+def _stack_codes(parts):
+    """Categorical Series of (codes, categories) parts stacked in order, with the sorted union of
+    their categories.
+
+    A column that is empty in every row of a batch (say subvertical) is read as float64, so its
+    categories are float64 while the others' are text; every part's categories are cast,
+    position by position, to the dtype of the first part that has any. The categories are merged
+    by one Categorical of all of them and each part's codes looked up in its codes, which unlike
+    union_categoricals caches no hash table on the result's categories.
+    """
+    categories = [part_categories for _, part_categories in parts]
+    dtype = next((part.dtype for part in categories if len(part)), categories[0].dtype)
+    categories = [part.astype(dtype) for part in categories]
+    merged = pd.Categorical(categories[0].append(categories[1:]))
+    offsets = np.cumsum([0] + [len(part) for part in categories])
+    codes = []
+    for (own, _), offset in zip(parts, offsets):
+        shifted = np.full(len(own), -1, dtype=np.int32)
+        present = own >= 0
+        shifted[present] = merged.codes[offset + own[present]]
+        codes.append(shifted)
+    return pd.Series(pd.Categorical.from_codes(np.concatenate(codes), dtype=merged.dtype))
+
+
+def union_categories(parts):
+    """Categorical Series stacked in order, with the sorted union of their categories (whose
+    dtypes may differ, see _stack_codes)."""
+    return _stack_codes([(part.cat.codes.to_numpy(), part.cat.categories) for part in parts])
+
+
+def concat_deals(*parts):
+    """Deal frames stacked in order; category columns are unioned so the result stays categorical."""
+    return pd.DataFrame({column: union_categories([part[column] for part in parts]) if column in CATEGORY_COLUMNS
+                         else pd.concat([part[column] for part in parts], ignore_index=True)
+                         for column in parts[0].columns})
+
+
+def _factorize_chunk(df):
+    # compact_dtypes for one chunk of an upload, its text columns kept as (codes, distinct values):
+    # a categorical per chunk would cache a Python string for each of its categories
+    chunk = {column: df[column] for column in df.columns}
+    for column in CATEGORY_COLUMNS:
+        codes, categories = pd.factorize(df[column])
+        chunk[column] = codes.astype(np.int32), categories
+    chunk['year'] = _downcast_int(df['year'], 'int16')
+    chunk['month'] = _downcast_int(df['month'], 'int8')
+    return chunk
+
+
+def clean_deals_chunked(source, chunksize=UPLOAD_CHUNK_SIZE, on_chunk=None):
+    """clean_deals for a whole CSV (a path or file), read chunksize rows at a time.
+
+    Each chunk is cleaned and made compact as it is read (its text columns factorized), so its
+    text is released before the next one is parsed; the chunks are stacked column by column at
+    the end, their categories merged once (_stack_codes). on_chunk(rows read so far) is called
+    after every chunk. Returns (deals, number of rejected rows).
+    """
+    chunks, rejected, rows = [], 0, 0
+    try:
+        # Columns outside the schema are never materialized
+        for raw in pd.read_csv(source, chunksize=chunksize, usecols=lambda column: column in CLEAN_COLUMNS):
+            deals, bad = _clean(raw)
+            if not deals.empty:
+                chunks.append(_factorize_chunk(deals))
+            rejected += len(bad)
+            rows += len(raw)
+            del raw, deals, bad
+            if on_chunk is not None:
+                on_chunk(rows)
+    except pd.errors.EmptyDataError:
+        raise ValueError('The file is empty') from None
+    if not chunks:
+        raise ValueError(f'No valid deals in the file ({rejected} rows rejected)')
+    columns = {}
+    for column in list(chunks[0]):
+        # Each column is taken out of the chunks as it is stacked, so it is never held twice
+        parts = [chunk.pop(column) for chunk in chunks]
+        columns[column] = (_stack_codes(parts) if column in CATEGORY_COLUMNS
+                           else pd.concat(parts, ignore_index=True))
+        del parts
+    return pd.DataFrame(columns), rejected
+
+
+def snapshot_path(csv_path):
+    # Sits next to the CSV: "startup_cleaned (1).csv" -> "startup_cleaned (1).feather"
+    return Path(csv_path).with_suffix('.feather')
+
+
+# Appended batches don't rewrite the snapshot: each goes to a numbered delta file next to it
+# ("startup_cleaned (1).delta-1.feather"), stamped with the CSV size before and after the batch.
+# load_deals merges the deltas into the snapshot, as does an append once there are too many.
+SNAPSHOT_DELTAS_KEPT = 16
+
+
+def _delta_paths(snapshot):
+    deltas = snapshot.parent.glob(f'{glob.escape(snapshot.stem)}.delta-*.feather')
+    return sorted(deltas, key=lambda path: int(path.suffixes[-2][len('.delta-'):]))
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _metadata(table):
+    return {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+
+
+def _snapshot_tables(snapshot, csv_path):
+    # The snapshot and its deltas (memory-mapped, not yet converted), or None when they don't
+    # add up to the current CSV
+    if pa is None or not snapshot.exists():
+        return None
+    table = feather.read_table(snapshot, memory_map=True)
+    meta = _metadata(table)
+    if meta.get('snapshot_version') != str(SNAPSHOT_VERSION):
+        return None
+
+    stat = os.stat(csv_path)
+    current = (str(stat.st_mtime_ns), str(stat.st_size))
+    if (meta.get('source_mtime_ns'), meta.get('source_size')) == current:
+        # Deltas left over from before the snapshot was last rewritten are ignored
+        return [table]
+    tables, size = [table], meta.get('source_size')
+    for path in _delta_paths(snapshot):
+        delta = feather.read_table(path, memory_map=True)
+        delta_meta = _metadata(delta)
+        if delta_meta.get('snapshot_version') != str(SNAPSHOT_VERSION) or delta_meta.get('base_size') != size:
+            return None
+        tables.append(delta)
+        size = delta_meta.get('source_size')
+        if (delta_meta.get('source_mtime_ns'), size) == current:
+            return tables
+    # Cheap checks first; only hash the CSV when its mtime or size moved and there are no deltas
+    if len(tables) == 1 and meta.get('source_sha256') == _file_sha256(csv_path):
+        return tables
+    return None
+
+
+def _write_feather(table, path, metadata):
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), **metadata})
+    tmp = path.with_name(path.name + '.tmp')
+    try:
+        # Uncompressed so later loads can memory-map it; replace() keeps readers from seeing a partial file
+        feather.write_feather(table, tmp, compression='uncompressed')
+        os.replace(tmp, path)
+    except OSError as exc:
+        logger.warning('Could not write snapshot %s: %s', path, exc)
+        return False
+    return True
+
+
+def _write_snapshot(df, snapshot, csv_path):
+    if pa is None:
+        return
+    stat = os.stat(csv_path)
+    written = _write_feather(pa.Table.from_pandas(df, preserve_index=False), snapshot, {
+        'snapshot_version': str(SNAPSHOT_VERSION),
+        'source_mtime_ns': str(stat.st_mtime_ns),
+        'source_size': str(stat.st_size),
+        'source_sha256': _file_sha256(csv_path),
+    })
+    if written:
+        # The snapshot now holds everything; a crash before this leaves deltas it ignores
+        for path in _delta_paths(snapshot):
+            path.unlink(missing_ok=True)
+
+
+def _write_delta(delta, snapshot, csv_path, base_size):
+    # delta was just appended to the CSV, which was base_size bytes before
+    stat = os.stat(csv_path)
+    paths = _delta_paths(snapshot)
+    number = int(paths[-1].suffixes[-2][len('.delta-'):]) + 1 if paths else 1
+    _write_feather(pa.Table.from_pandas(delta, preserve_index=False),
+                   snapshot.with_name(f'{snapshot.stem}.delta-{number}.feather'), {
+                       'snapshot_version': str(SNAPSHOT_VERSION),
+                       'base_size': str(base_size),
+                       'source_mtime_ns': str(stat.st_mtime_ns),
+                       'source_size': str(stat.st_size),
+                   })
+
+
+def dataset_version(csv_path):
+    # Changes whenever the source CSV or the cleaning rules do; used to key derived caches
+    stat = os.stat(csv_path)
+    return f'{SNAPSHOT_VERSION}:{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def load_deals(csv_path):
+    """Cleaned deals for csv_path, served from the columnar snapshot when it is still current."""
+    snapshot = snapshot_path(csv_path)
+    tables = _snapshot_tables(snapshot, csv_path)
+    if tables is None:
+        df = read_clean_csv(csv_path)
+        _write_snapshot(df, snapshot, csv_path)
+        return df
+    df = concat_deals(*(table.to_pandas() for table in tables)) if len(tables) > 1 else tables[0].to_pandas()
+    if len(tables) > 1:
+        # Merge the appended batches in, so the next load reads one file
+        _write_snapshot(df, snapshot, csv_path)
+    return df
+
+
+def split_investors(investors):
+    # One row per (deal position, investor) pair; the index holds the deal's row position
+    names = pd.Series(investors.to_numpy(), index=np.arange(len(investors)))
+    exploded = names.str.split(',').explode()
+    exploded = exploded.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return exploded[exploded.notna() & (exploded != '')]
+
+
+def build_investor_index(df, aliases=None):
+    """Map each trimmed investor name, or its canonical name given an alias table, to the row positions of its deals."""
+    exploded = split_investors(df['investors'])
+    if aliases is not None:
+        exploded = exploded.map(aliases['canonical'])
+    positions = exploded.index.to_numpy()
+    groups = pd.Series(positions).groupby(exploded.to_numpy(), sort=True).indices
+    return {name: np.unique(positions[rows]) for name, rows in groups.items()}
+
+
+def investor_deals(df, investor_index, investor_name, mask=None):
+    # Exact-identity lookup: "Accel" does not pull in "Accel Partners India"; mask is a filters.filter_mask
+    positions = investor_index.get(investor_name)
+    if positions is None:
+        return df.iloc[0:0]
+    return df.iloc[restrict(positions, mask)]
+
+
+def build_startup_profiles(df):
+    """One row per startup with its first recorded city, vertical and subvertical, plus its deal row positions."""
+    groups = df.groupby('startup', observed=True, sort=False)
+    profiles = groups[['city', 'vertical', 'subvertical']].first()
+    profiles['deals'] = pd.Series(groups.indices)
+    # Kept categorical: looking a name up goes through the hash table its categories built when the
+    # column was made categorical, where plain labels would hash every name on the first lookup
+    return profiles
+
+
+def build_vertical_index(df):
+    # vertical -> distinct startups with a deal in that vertical, in first-seen order
+    by_vertical = df.groupby('vertical', observed=True, sort=False)['startup'].unique()
+    return {vertical: list(startups) for vertical, startups in by_vertical.items()}
+
+
+def startup_deals(df, profiles, startup, mask=None):
+    if startup not in profiles.index:
+        return df.iloc[0:0]
+    return df.iloc[restrict(profiles.at[startup, 'deals'], mask)]
+
+
+def startup_profile(profiles, startup):
+    # Exact match on the name: "Ola" no longer pulls in "Olacabs" or "Zolostays"
+    return profiles.loc[startup] if startup in profiles.index else None
+
+
+def similar_startups(vertical_index, vertical, startup, limit=5):
+    # Other startups with a deal in the same vertical, in first-seen order
+    return [company for company in vertical_index.get(vertical, []) if company != startup][:limit]
+
+
+# Incremental updates: each takes a structure built for the first `offset` rows and returns a new
+# one that also covers `delta`, appended after them. Inputs are never modified, so pages still
+# reading the previous dataset are unaffected.
+
+
+def extend_investor_index(investor_index, delta, offset, aliases=None):
+    extended = dict(investor_index)
+    for name, positions in build_investor_index(delta, aliases).items():
+        positions = positions + offset
+        extended[name] = np.concatenate([extended[name], positions]) if name in extended else positions
+    return extended
+
+
+def extend_startup_profiles(profiles, delta, offset):
+    added = build_startup_profiles(delta)
+    added['deals'] = added['deals'].map(lambda positions: positions + offset)
+    # Categorical labels from different batches don't align; plain ones do
+    profiles = profiles.set_axis(profiles.index.astype(object))
+    added.index = added.index.astype(object)
+
+    # Existing startups keep their first recorded details and gain the new deal positions
+    known = added.index.isin(profiles.index)
+    extended = profiles.copy()
+    extended['deals'] = extended['deals'].copy()
+    for startup, positions in added.loc[known, 'deals'].items():
+        extended.at[startup, 'deals'] = np.concatenate([profiles.at[startup, 'deals'], positions])
+    return pd.concat([extended, added[~known]])
+
+
+def extend_vertical_index(vertical_index, delta):
+    extended = dict(vertical_index)
+    for vertical, startups in build_vertical_index(delta).items():
+        current = extended.get(vertical, [])
+        seen = set(current)
+        extended[vertical] = current + [startup for startup in startups if startup not in seen]
+    return extended
+
+
+def canonicalize_startups(df, startup_aliases):
+    # Pages group and look up on the canonical name; startup_id is the entity's stable ID
+    startup, startup_id = canonicalize(df['startup'], startup_aliases)
+    return df.assign(startup=startup, startup_id=startup_id)
+
+
+def build_dataset(df, version):
+    """The deals plus every structure the pages read, tagged with the dataset version.
+
+    Startup names in the returned deals are canonicalized; the alias tables map every spelling
+    seen in the feed to its entity (see entities.py).
+    """
+    startup_aliases = resolve_aliases(alias_counts(df['startup']), LEGAL_WORDS)
+    investor_aliases = resolve_aliases(alias_counts(split_investors(df['investors'])), INVESTOR_WORDS, people=True)
+    df = canonicalize_startups(df, startup_aliases)
+    investor_index = build_investor_index(df, investor_aliases)
+    startup_profiles = build_startup_profiles(df)
+    partials = overall_partials(df)
+    return {
+        'df': df,
+        'version': version,
+        'startup_aliases': startup_aliases,
+        'investor_aliases': investor_aliases,
+        'investor_index': investor_index,
+        'investor_names': list(investor_index),
+        'startup_profiles': startup_profiles,
+        'startup_names': sorted(startup_profiles.index),
+        'vertical_index': build_vertical_index(df),
+        'filter_index': build_filter_index(df),
+        'cube': build_cube(df),
+        'coinvestment': build_graph(*incidence(investor_index, investor_aliases), df['amount'].to_numpy(),
+                                    df['startup_id'].to_numpy(), entity_names(investor_aliases),
+                                    entity_names(startup_aliases)),
+        'partials': partials,
+        'aggregates': summarize_overall(partials, len(startup_profiles)),
+    }
+
+
+def extend_dataset(dataset, delta, version):
+    """build_dataset for the dataset's deals plus delta, without rescanning the existing deals."""
+    offset = len(dataset['df'])
+    startup_aliases = resolve_aliases(alias_counts(delta['startup']), LEGAL_WORDS, dataset['startup_aliases'])
+    investor_aliases = resolve_aliases(alias_counts(split_investors(delta['investors'])), INVESTOR_WORDS,
+                                       dataset['investor_aliases'], people=True)
+    delta = canonicalize_startups(delta, startup_aliases)
+    investor_index = extend_investor_index(dataset['investor_index'], delta, offset, investor_aliases)
+    startup_profiles = extend_startup_profiles(dataset['startup_profiles'], delta, offset)
+    partials = merge_partials(dataset['partials'], overall_partials(delta))
+    coinvestment = extend_graph(dataset['coinvestment'],
+                                *incidence(build_investor_index(delta, investor_aliases), investor_aliases, offset),
+                                delta['amount'].to_numpy(), delta['startup_id'].to_numpy(),
+                                entity_names(investor_aliases), entity_names(startup_aliases))
+
+    # A day's batch adds a handful of names, so inserting keeps the sorted lists cheaper than re-sorting
+    investor_names = list(dataset['investor_names'])
+    for name in investor_index.keys() - dataset['investor_index'].keys():
+        bisect.insort(investor_names, name)
+    startup_names = list(dataset['startup_names'])
+    for name in startup_profiles.index[len(dataset['startup_profiles']):]:
+        bisect.insort(startup_names, name)
+
+    return {
+        'df': concat_deals(dataset['df'], delta),
+        'version': version,
+        'startup_aliases': startup_aliases,
+        'investor_aliases': investor_aliases,
+        'investor_index': investor_index,
+        'investor_names': investor_names,
+        'startup_profiles': startup_profiles,
+        'startup_names': startup_names,
+        'vertical_index': extend_vertical_index(dataset['vertical_index'], delta),
+        'filter_index': extend_filter_index(dataset['filter_index'], delta, offset),
+        'cube': extend_cube(dataset['cube'], delta, offset),
+        'coinvestment': coinvestment,
+        'partials': partials,
+        'aggregates': summarize_overall(partials, len(startup_profiles)),
+    }
+
+
+def append_to_csv(delta, csv_path):
+    rows = delta[CLEAN_COLUMNS].assign(date=delta['date'].dt.strftime('%Y-%m-%d'))
+    with open(csv_path, 'rb') as f:
+        # Don't glue the first new row onto a last line without a trailing newline
+        f.seek(-1, os.SEEK_END)
+        needs_newline = f.read(1) not in (b'\n', b'\r')
+    with open(csv_path, 'a', newline='', encoding='utf-8') as f:
+        if needs_newline:
+            f.write('\n')
+        rows.to_csv(f, header=False, index=False)
+
+
+# The served dataset is shared by all entry points and sessions: one warm copy per server process,
+# whichever script variant is being served. append_deals swaps in an extended copy.
+
+
+@st.cache_resource
+def _dataset_holder():
+    df = load_deals(DATA_PATH)
+    return {'dataset': build_dataset(df, dataset_version(DATA_PATH)), 'lock': threading.Lock()}
+
+
+def current_dataset():
+    # Read once per rerun; a concurrent append replaces the whole dict rather than mutating it
+    return _dataset_holder()['dataset']
+
+
+def load_data():
+    dataset = current_dataset()
+    return dataset['df'], dataset['investor_index']
+
+
+def load_investor_names():
+    return current_dataset()['investor_names']
+
+
+def append_deals(source, csv_path=DATA_PATH):
+    """Validate, clean and append a batch of deals (a CSV path or file) to the served dataset.
+
+    The batch is appended to the source CSV and written to a snapshot delta file, so restarts see
+    it too without rewriting the whole snapshot; indexes and aggregates are extended instead of
+    rebuilt. Returns (appended, rejected).
+    """
+    delta, rejected = clean_deals(pd.read_csv(source))
+    holder = _dataset_holder()
+    with holder['lock']:
+        if not delta.empty:
+            # The snapshot holds the deals as written, before canonicalization; check it while it is still current
+            snapshot = snapshot_path(csv_path)
+            tables = _snapshot_tables(snapshot, csv_path)
+            base_size = os.stat(csv_path).st_size
+            # Extend first, so a batch that cannot be added leaves the CSV and the served dataset as they were;
+            # the version is that of the CSV with the batch written
+            extended = extend_dataset(holder['dataset'], delta, None)
+            append_to_csv(delta, csv_path)
+            holder['dataset'] = {**extended, 'version': dataset_version(csv_path)}
+            if tables is not None and len(tables) > SNAPSHOT_DELTAS_KEPT:
+                _write_snapshot(concat_deals(*(table.to_pandas() for table in tables), delta), snapshot, csv_path)
+            elif tables is not None:
+                _write_delta(delta, snapshot, csv_path, base_size)
+    return len(delta), rejected
+
+
+# Uploaded files are analyzed on their own, next to the served dataset: each gets a version derived
+# from its contents, which keys every cache built from it. The datasets live in a shared LRU, so
+# sessions uploading the same file share one copy.
+
+
+def _uploads():
+    # Bounded by count only: an uploaded dataset takes what its file needs, and walking its
+    # indexes to size it takes seconds for a file of a million deals
+    return shared_lru('uploaded_datasets', max_entries=UPLOADS_KEPT, max_bytes=None)
+
+
+def _upload_version(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(1 << 20), b''):
+        digest.update(block)
+    file.seek(0)
+    return f'{SNAPSHOT_VERSION}:upload:{digest.hexdigest()[:16]}'
+
+
+def load_upload(file, on_chunk=None):
+    """The dataset (as build_dataset) for an uploaded CSV file in the cleaned schema.
+
+    The file is validated and cleaned in chunks (clean_deals_chunked) and closed once they are
+    read; the dataset's 'rejected' holds the number of rows left out. Raises ValueError when the
+    file has no valid deals.
+    """
+    version = _upload_version(file)
+
+    def build():
+        try:
+            deals, rejected = clean_deals_chunked(file, on_chunk=on_chunk)
+        finally:
+            # An uploaded file is an in-memory buffer: free it before the indexes are built
+            file.close()
+        return {**build_dataset(deals, version), 'rejected': rejected}
+
+    return _uploads().get_or_compute(version, build)
+
+
+def uploaded_dataset(version):
+    """The uploaded dataset of this version, or None once it has been evicted."""
+    return _uploads().get(version)
@@ -1,33 +1,14 @@
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 
+from data import load_data
+
 # Set the Streamlit page configuration with an icon and title
 st.set_page_config(layout='wide', page_title='📊 Startup Funding Analysis')
 
-# Cache the data loading to improve performance
-@st.cache_data
-def load_data():
-    df = pd.read_csv("startup_cleaned (1).csv")
-
-    # Fix years in the date column
-    def fix_year(date_str):
-        if date_str.count("/") == 2:
-            parts = date_str.split("/")
-            if len(parts[2]) == 3:  # If the year has only 3 digits, fix it
-                parts[2] = parts[2].zfill(4)
-            return "/".join(parts)
-        return date_str
-
-    df['date'] = df['date'].apply(fix_year)
-    df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-    df['year'] = df['date'].dt.year
-    df['month'] = df['date'].dt.month
-    return df
-
 # Load data
-df = load_data()
+df, _ = load_data()
 
 # Add a header for the page
 st.header('📈 Overall Startup Funding Analysis')
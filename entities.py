@@ -0,0 +1,195 @@
+"""Canonical entities for startup and investor names that the feed spells several ways.
+
+"BYJU'S" / "Byju’s", "Ola Cabs" / "Olacabs" and "Sequoia Capital India" / "Sequoia India" are
+each one entity. Names are clustered in three near-linear passes:
+
+1. names with the same normalized key (search.normalize_name) are merged;
+2. names with the same core key, the normalized key without legal and fund words such as
+   "Capital", "Partners" or "Pvt Ltd", are merged;
+3. core keys are blocked on their first two letters, their digits and their length, and every
+   pair in a block or in the block one letter longer is merged when they are near-identical
+   strings, which catches typos.
+
+Investor names that look like a person's ("Manish Gupta") skip the typo pass, since "Manisha
+Gupta" is somebody else; they are merged only when they have the same words, in any order.
+Whether two names merge depends only on the two names, so clustering a dataset in one go and
+extending it batch by batch give the same entities.
+
+The result is an alias table: one row per distinct name as written, in first-seen order, with
+the entity's integer ID, its canonical name (the first spelling seen, skipping ones mangled by
+the export) and the number of deals that spelled it that way. IDs are numbered in first-seen
+order too, so appending deals never renumbers or renames existing entities.
+"""
+import re
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+from search import name_tokens
+
+# Words that don't tell two companies apart
+LEGAL_WORDS = frozenset({'pvt', 'private', 'ltd', 'limited', 'llc', 'llp', 'inc', 'corp', 'corporation', 'co',
+                         'company', 'the'})
+# ...and, for investors, words that don't tell two funds apart
+INVESTOR_WORDS = LEGAL_WORDS | frozenset({'capital', 'ventures', 'venture', 'partners', 'partner', 'advisors',
+                                          'advisory', 'management', 'investments', 'investment', 'fund', 'funds',
+                                          'group', 'holdings', 'and', 'others'})
+# The similarity needed to merge two core keys
+MIN_RATIO = 0.9
+MAX_LENGTH_DIFFERENCE = 1
+# Shorter core keys are only merged on exact matches: "ola" and "olx" are different companies
+MIN_FUZZY_LENGTH = 6
+# Person-like names have this many words, all letters and none of them stop words
+PERSON_WORDS = range(2, 4)
+_NOT_DIGIT = re.compile(r'\D')
+
+
+def _keys(name, stop_words, people):
+    # The normalized key, the core key and, for a person-like name, its sorted words (else None)
+    tokens = name_tokens(name)
+    key = ''.join(tokens)
+    core = ''.join(token for token in tokens if token not in stop_words)
+    person = None
+    if people and len(tokens) in PERSON_WORDS and all(token.isalpha() and token not in stop_words
+                                                      for token in tokens):
+        person = ' '.join(sorted(tokens))
+    return key, core or key, person
+
+
+def _similar(a, b):
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    return matcher.real_quick_ratio() >= MIN_RATIO and matcher.quick_ratio() >= MIN_RATIO and \
+        matcher.ratio() >= MIN_RATIO
+
+
+def _readable(alias):
+    # Spellings carrying export debris (literal escapes, stray quotes) only name an entity as a last resort
+    return '\\x' not in alias and '"' not in alias
+
+
+def _clusters(keys, cores, persons):
+    # Union-find over the names; returns each name's cluster representative
+    parent = list(range(len(keys)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    for groups in (keys, cores, persons):
+        first = {}
+        for i, value in enumerate(groups):
+            if value is not None:
+                union(i, first.setdefault(value, i))
+
+    # A person-like name only stands for one core key, since it has no stop words to drop
+    first_by_core, person_cores = {}, set()
+    for i, core in enumerate(cores):
+        first_by_core.setdefault(core, i)
+        if persons[i] is not None:
+            person_cores.add(core)
+    # A typo adds, drops or swaps a letter, so it keeps the length within MAX_LENGTH_DIFFERENCE; shared
+    # prefixes are likely too, and numbers must agree exactly: "Fund 2" is not "Fund 3"
+    blocks = {}
+    for core in first_by_core:
+        if len(core) >= MIN_FUZZY_LENGTH and core not in person_cores:
+            blocks.setdefault((core[:2], _NOT_DIGIT.sub('', core), len(core)), []).append(core)
+    for (prefix, number, length), block in blocks.items():
+        for difference in range(MAX_LENGTH_DIFFERENCE + 1):
+            others = blocks.get((prefix, number, length + difference), ())
+            for pos, core in enumerate(block):
+                # Within the block itself, each pair once
+                for other in others[pos + 1:] if difference == 0 else others:
+                    if _similar(core, other):
+                        union(first_by_core[core], first_by_core[other])
+
+    return np.array([find(i) for i in range(len(keys))])
+
+
+def alias_counts(names):
+    """Distinct names in first-seen order with the number of times each occurs."""
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        # Straight from the codes, without materializing a string per row
+        codes = names.cat.codes.to_numpy()
+        present, first, counts = np.unique(codes[codes >= 0], return_index=True, return_counts=True)
+        order = np.argsort(first)
+        return pd.Series(counts[order], index=pd.Index(names.cat.categories[present[order]], dtype=object))
+    names = names.dropna().astype(object)
+    return names.value_counts(sort=False).reindex(names.unique())
+
+
+def resolve_aliases(counts, stop_words, previous=None, people=False):
+    """Alias table for counts (alias_counts output); see the module docstring.
+
+    With people, person-like names are only merged on the same words (investor names).
+
+    With a previous alias table, its aliases keep their entity and canonical name; new aliases
+    join the entity they cluster with, or get the next free IDs.
+    """
+    if previous is not None:
+        counts = previous['rows'].add(counts, fill_value=0).reindex(
+            previous.index.append(counts.index.difference(previous.index, sort=False)))
+    aliases = counts.index.tolist()
+    keys, cores, persons = zip(*(_keys(alias, stop_words, people) for alias in aliases)) if aliases else ((), (), ())
+    rows = counts.to_numpy(dtype='int64')
+    root = _clusters(keys, cores, persons)
+
+    if previous is None:
+        entity_of_root, canonical_of_root, next_id = {}, {}, 0
+    else:
+        known = len(previous)
+        known_ids, known_canonical = previous['entity_id'].to_numpy(), previous['canonical'].tolist()
+        # The lowest known entity in each cluster claims it
+        order = np.argsort(known_ids, kind='stable')
+        entity_of_root, canonical_of_root = {}, {}
+        for i in order.tolist():
+            entity_of_root.setdefault(root[i], known_ids[i])
+            canonical_of_root.setdefault(root[i], known_canonical[i])
+        next_id = int(known_ids.max()) + 1 if known else 0
+
+    # The first clean spelling names each new entity, so appends and a rebuild agree on it
+    best = {}
+    for i, r in enumerate(root):
+        if r not in best or _readable(aliases[i]) > _readable(aliases[best[r]]):
+            best[r] = i
+
+    entity_ids, canonical = np.empty(len(aliases), dtype='int64'), []
+    for i, r in enumerate(root):
+        if r not in entity_of_root:
+            entity_of_root[r], canonical_of_root[r] = next_id, aliases[best[r]]
+            next_id += 1
+        entity_ids[i] = entity_of_root[r]
+        canonical.append(canonical_of_root[r])
+
+    if previous is not None:
+        # Known aliases, which come first, keep their entity even if a new spelling now links two of them
+        entity_ids[:known] = known_ids
+        canonical[:known] = known_canonical
+    return pd.DataFrame({'entity_id': entity_ids, 'canonical': canonical, 'rows': rows},
+                        index=pd.Index(aliases, dtype=object, name='alias'))
+
+
+def canonicalize(names, aliases):
+    """names (categorical) relabelled with their canonical names, plus the matching entity IDs."""
+    # Only the names that occur: a slice of a dataset keeps the categories of the whole
+    names = names.cat.remove_unused_categories()
+    categories = aliases.loc[names.cat.categories]
+    canonical = pd.Categorical(categories['canonical'].to_numpy())
+    codes = names.cat.codes.to_numpy()
+    missing = codes < 0
+    new_codes = np.where(missing, -1, canonical.codes[codes])
+    entity_ids = categories['entity_id'].to_numpy()[codes]
+    return (pd.Series(pd.Categorical.from_codes(new_codes, canonical.categories), index=names.index),
+            pd.Series(np.where(missing, -1, entity_ids).astype('int32'), index=names.index))
+
+
+def entity_ids(aliases):
+    """Canonical name -> entity ID, for looking up what is stored per entity."""
+    return dict(zip(aliases['canonical'], aliases['entity_id'].tolist()))
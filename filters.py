@@ -0,0 +1,103 @@
+"""Global sidebar filters (date range, city, vertical, round) over the loaded deals.
+
+A filter index is built with the dataset: the row positions of every city, vertical and round
+value, and the row positions in date order. A filter then becomes one row mask: each dimension's
+mask is set from the positions of its selected values (or the date-ordered slice for a range) and
+the masks are ANDed, so the cost depends on the rows selected, never on re-evaluating a
+comparison over the whole frame. Pages restrict their own row positions with the mask, e.g. an
+investor's deals, instead of filtering a frame.
+
+Filters are a dict: {'dates': (start, end) or None, 'city': [...], 'vertical': [...], 'round': [...]};
+an empty list or None leaves that dimension unfiltered.
+"""
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['city', 'vertical', 'round']
+NO_FILTERS = {'dates': None, 'city': [], 'vertical': [], 'round': []}
+
+
+def is_active(filters):
+    return any(filters[key] for key in NO_FILTERS)
+
+
+def _value_positions(df, column, offset=0):
+    groups = df.groupby(column, observed=True, sort=False).indices
+    return {value: (positions + offset).astype(np.int32) for value, positions in groups.items()}
+
+
+def build_filter_index(df):
+    """Row positions per city, vertical and round value, and all row positions in date order."""
+    # Stable, with unparseable dates (NaT) sorted last, so a date range never selects them
+    order = np.argsort(df['date'].to_numpy(), kind='stable').astype(np.int32)
+    return {
+        'rows': len(df),
+        'date_order': order,
+        'sorted_dates': df['date'].to_numpy()[order],
+        'values': {column: _value_positions(df, column) for column in FILTER_COLUMNS},
+    }
+
+
+def extend_filter_index(index, delta, offset):
+    """build_filter_index for the indexed rows plus delta, appended after the first `offset` rows."""
+    dates = delta['date'].to_numpy()
+    order = np.argsort(dates, kind='stable')
+    dates = dates[order]
+    # Equal dates keep row order: new rows go after the existing ones
+    at = np.searchsorted(index['sorted_dates'], dates, side='right')
+    values = {}
+    for column in FILTER_COLUMNS:
+        values[column] = dict(index['values'][column])
+        for value, positions in _value_positions(delta, column, offset).items():
+            current = values[column].get(value)
+            values[column][value] = positions if current is None else np.concatenate([current, positions])
+    return {
+        'rows': index['rows'] + len(delta),
+        'date_order': np.insert(index['date_order'], at, (order + offset).astype(np.int32)),
+        'sorted_dates': np.insert(index['sorted_dates'], at, dates),
+        'values': values,
+    }
+
+
+def filter_options(index):
+    """What the sidebar filters offer: the date span and every city, vertical and round."""
+    dates = index['sorted_dates'][~pd.isna(index['sorted_dates'])]
+    span = (pd.Timestamp(dates[0]).date(), pd.Timestamp(dates[-1]).date()) if len(dates) else None
+    return {'dates': span, **{column: sorted(index['values'][column]) for column in FILTER_COLUMNS}}
+
+
+def filter_mask(index, filters):
+    """Boolean row mask for filters, or None when they select every row."""
+    mask = None
+
+    def select(positions):
+        nonlocal mask
+        selected = np.zeros(index['rows'], dtype=bool)
+        selected[positions] = True
+        if mask is None:
+            mask = selected
+        else:
+            mask &= selected
+
+    if filters['dates']:
+        start, end = filters['dates']
+        # Whole days: the end date is included
+        lo = np.searchsorted(index['sorted_dates'], np.datetime64(start, 'D'), side='left')
+        hi = np.searchsorted(index['sorted_dates'], np.datetime64(end, 'D') + 1, side='left')
+        select(index['date_order'][lo:hi])
+    for column in FILTER_COLUMNS:
+        if filters[column]:
+            empty = np.empty(0, dtype=np.int32)
+            select(np.concatenate([index['values'][column].get(value, empty) for value in filters[column]]))
+    return mask
+
+
+def restrict(positions, mask):
+    """The row positions (sorted) that pass mask."""
+    return positions if mask is None else positions[mask[positions]]
+
+
+def similar_startups(df, index, mask, vertical, startup, limit=5):
+    # data.similar_startups over the filtered deals: startups with a matching deal in the vertical, first seen first
+    positions = restrict(index['values']['vertical'].get(vertical, np.empty(0, dtype=np.int32)), mask)
+    return [company for company in df['startup'].iloc[positions].unique() if company != startup][:limit]
@@ -0,0 +1,256 @@
+"""Co-investment graph: which investors back the same deals, how often and with how much.
+
+Nodes are the canonical investor entity IDs of the alias table (entities.py). Every two investors
+of one deal's syndicate share an edge, weighted by the number of deals they made together and the
+total amount of those deals. Edges are stored as CSR arrays, the neighbours of investor i being
+neighbor_ids[neighbor_indptr[i]:neighbor_indptr[i + 1]], with each row ordered strongest first
+(most deals, then largest amount, then lowest ID), so anyone's top co-investors are a slice.
+
+Alongside the edges the graph keeps the (deal, investor) incidence in both directions, each
+deal's amount and startup, and each investor's portfolio of startup IDs. These answer the same
+questions under the sidebar filters (whose row mask selects the deals that count) and give the
+companies two investors have both backed.
+
+Building sorts the pairs once, then pairs up the members of every syndicate with one vectorized
+pass per syndicate size, so the cost follows the number of co-investment pairs rather than the
+square of the number of investors.
+"""
+import numpy as np
+import pandas as pd
+
+from entities import entity_ids
+from filters import restrict
+
+TOP_CO_INVESTORS = 10
+# Shared portfolio companies named per co-investor
+SHARED_LISTED = 3
+# Partner lists longer than 1 / COUNT_SHARE of all investors are summed per investor slot
+COUNT_SHARE = 16
+# A portfolio holding more than this share of all startups is intersected through a lookup table
+LOOKUP_SHARE = 1 / 64
+
+
+def entity_names(aliases):
+    """Canonical names as an array indexed by entity ID."""
+    entities = aliases.drop_duplicates('entity_id')
+    names = np.empty(int(entities['entity_id'].max()) + 1 if len(entities) else 0, dtype=object)
+    names[entities['entity_id'].to_numpy()] = entities['canonical'].to_numpy()
+    return names
+
+
+def incidence(investor_index, aliases, offset=0):
+    """(deal positions, investor entity IDs) of every pair in an investor index built with aliases
+    (data.build_investor_index), its positions shifted by offset."""
+    if not investor_index:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    ids = entity_ids(aliases)
+    deals = np.concatenate(list(investor_index.values())).astype(np.int64) + offset
+    investors = np.repeat([ids[name] for name in investor_index],
+                          [len(positions) for positions in investor_index.values()])
+    return deals, investors.astype(np.int64)
+
+
+def _indptr(rows, n):
+    # CSR row pointers for sorted row numbers
+    return np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n))]).astype(np.int64)
+
+
+def _ranges(indptr, rows):
+    # Positions of the entries of each of rows, concatenated
+    starts, lengths = indptr[rows], indptr[rows + 1] - indptr[rows]
+    return np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+
+
+def _runs(keys):
+    # Sorted keys: True where a run of equal keys starts
+    return np.concatenate([[True], keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=bool)
+
+
+def _unique(keys):
+    # np.unique by sorting, which is several times faster than its hashing on these integer keys
+    keys = np.sort(keys)
+    return keys[_runs(keys)]
+
+
+def _unique_pairs(deals, investors, n):
+    # Sorted by deal, then investor; an investor named twice in one syndicate counts once
+    pairs = _unique(deals * n + investors)
+    return pairs // n, pairs % n
+
+
+def _syndicate_edges(deals, investors, amounts):
+    """Both directions of every co-investment in the unique pairs, one deal each: (first, second,
+    deals, amounts). Pairs members of a syndicate gap apart, for each gap that any syndicate spans."""
+    first, second, shared = [], [], []
+    candidates = np.arange(len(deals) - 1)
+    gap = 1
+    while len(candidates):
+        # A deal's pairs are contiguous, so the pairs gap + 1 apart start among those gap apart
+        candidates = candidates[deals[candidates + gap] == deals[candidates]]
+        first.append(investors[candidates])
+        second.append(investors[candidates + gap])
+        shared.append(deals[candidates])
+        gap += 1
+        candidates = candidates[candidates + gap < len(deals)]
+    none = [deals[:0]]
+    first, second = np.concatenate(first or none), np.concatenate(second or none)
+    shared = amounts[np.concatenate(shared or none)]
+    return (np.concatenate([first, second]), np.concatenate([second, first]),
+            np.ones(2 * len(first), dtype=np.int64), np.concatenate([shared, shared]))
+
+
+def _group_sums(keys, *weights):
+    # The distinct keys, sorted, and each weights array summed per key
+    order = np.argsort(keys, kind='stable')
+    keys = keys[order]
+    starts = _runs(keys)
+    group = np.cumsum(starts) - 1
+    return (keys[starts], *(np.bincount(group, weights=values[order], minlength=starts.sum()) for values in weights))
+
+
+def _neighbors(edges, n):
+    # CSR over n investors, parallel edges merged, each row strongest first
+    first, second, deals, amounts = edges
+    keys, together, amount = _group_sums(first * n + second, deals, amounts)
+    together = together.astype(np.int64)
+    rows, ids = keys // n, keys % n
+    order = np.lexsort((ids, -amount, -together, rows))
+    return {'neighbor_indptr': _indptr(rows, n), 'neighbor_ids': ids[order], 'neighbor_deals': together[order],
+            'neighbor_amounts': amount[order]}
+
+
+def _graph(deals, investors, edges, deal_amounts, deal_startups, investor_names, startup_names):
+    n = len(investor_names)
+    by_investor = np.argsort(investors, kind='stable')
+    holdings = deal_startups[deals]
+    known = holdings >= 0
+    m = max(len(startup_names), 1)
+    portfolio = _unique(investors[known] * m + holdings[known])
+    return {
+        'investor_names': investor_names,
+        'startup_names': startup_names,
+        **_neighbors(edges, n),
+        # Deals of each investor, in row order, and investors of each deal
+        'investor_indptr': _indptr(investors, n),
+        'investor_deals': deals[by_investor],
+        'deal_indptr': _indptr(deals, len(deal_amounts)),
+        'deal_investors': investors,
+        'deal_amounts': deal_amounts,
+        'deal_startups': deal_startups,
+        # Distinct startup IDs of each investor, sorted
+        'portfolio_indptr': _indptr(portfolio // m, n),
+        'portfolio': portfolio % m,
+    }
+
+
+def _deal_arrays(amounts, startup_ids):
+    # Missing amounts add nothing to a pair's total, as in the pages' sums
+    return np.nan_to_num(np.asarray(amounts, dtype=np.float64)), np.asarray(startup_ids, dtype=np.int64)
+
+
+def build_graph(deals, investors, amounts, startup_ids, investor_names, startup_names):
+    """The co-investment graph of the (deal position, investor ID) pairs (see incidence).
+
+    amounts and startup_ids hold each deal's amount and startup entity ID (-1 for none) by row
+    position; investor_names and startup_names are entity_names of the alias tables.
+    """
+    deal_amounts, deal_startups = _deal_arrays(amounts, startup_ids)
+    deals, investors = _unique_pairs(deals, investors, len(investor_names))
+    edges = _syndicate_edges(deals, investors, deal_amounts)
+    return _graph(deals, investors, edges, deal_amounts, deal_startups, investor_names, startup_names)
+
+
+def extend_graph(graph, deals, investors, amounts, startup_ids, investor_names, startup_names):
+    """build_graph for the graph's deals plus the appended ones, without re-pairing the existing
+    syndicates: the new pairs' edges are merged into the stored ones."""
+    new_amounts, new_startups = _deal_arrays(amounts, startup_ids)
+    deals, investors = _unique_pairs(deals, investors, len(investor_names))
+    rows = np.repeat(np.arange(len(graph['investor_names'])), np.diff(graph['neighbor_indptr']))
+    old_edges = (rows, graph['neighbor_ids'], graph['neighbor_deals'], graph['neighbor_amounts'])
+    deal_amounts = np.concatenate([graph['deal_amounts'], new_amounts])
+    new_edges = _syndicate_edges(deals, investors, deal_amounts)
+    edges = tuple(np.concatenate([old, new]) for old, new in zip(old_edges, new_edges))
+    # The appended deals come after every stored one, so the pairs stay sorted by deal
+    old_deals = np.repeat(np.arange(len(graph['deal_amounts'])), np.diff(graph['deal_indptr']))
+    return _graph(np.concatenate([old_deals, deals]), np.concatenate([graph['deal_investors'], investors]), edges,
+                  deal_amounts, np.concatenate([graph['deal_startups'], new_startups]), investor_names,
+                  startup_names)
+
+
+def _intersect(first, second):
+    # Sorted unique arrays; binary search of the shorter in the longer, as a hub investor's
+    # portfolio can be orders of magnitude larger than the other's
+    if len(first) > len(second):
+        first, second = second, first
+    found = np.searchsorted(second, first)
+    return first[second[np.minimum(found, len(second) - 1)] == first] if len(second) else second
+
+
+def _shared(own, portfolios, startups):
+    # own intersected with each of portfolios. A large portfolio (a hub investor's) is marked in a
+    # table of the startups once, so each intersection is one gather rather than binary searches
+    if len(own) <= LOOKUP_SHARE * startups:
+        return [_intersect(own, other) for other in portfolios]
+    member = np.zeros(startups, dtype=bool)
+    member[own] = True
+    return [other[member[other]] for other in portfolios]
+
+
+def investor_deals(graph, investor, mask=None):
+    """Row positions of the investor's deals (passing mask, a filters.filter_mask)."""
+    indptr = graph['investor_indptr']
+    return restrict(graph['investor_deals'][indptr[investor]:indptr[investor + 1]], mask)
+
+
+def portfolio(graph, investor, mask=None):
+    """Sorted startup IDs the investor has backed (in deals passing mask)."""
+    if mask is None:
+        indptr = graph['portfolio_indptr']
+        return graph['portfolio'][indptr[investor]:indptr[investor + 1]]
+    startups = _unique(graph['deal_startups'][investor_deals(graph, investor, mask)])
+    return startups[startups >= 0]
+
+
+def co_investors(graph, investor, limit=TOP_CO_INVESTORS, mask=None):
+    """The investor's strongest co-investors: (IDs, deals together, amount together), strongest first.
+
+    Without a mask this is a slice of the stored row; with one, only the deals passing it count.
+    """
+    if mask is None:
+        lo, hi = graph['neighbor_indptr'][investor], graph['neighbor_indptr'][investor + 1]
+        hi = min(hi, lo + limit)
+        return graph['neighbor_ids'][lo:hi], graph['neighbor_deals'][lo:hi], graph['neighbor_amounts'][lo:hi]
+    deals = investor_deals(graph, investor, mask)
+    indptr = graph['deal_indptr']
+    entries = _ranges(indptr, deals)
+    partners = graph['deal_investors'][entries]
+    amounts = np.repeat(graph['deal_amounts'][deals], indptr[deals + 1] - indptr[deals])
+    others = partners != investor
+    partners, amounts = partners[others], amounts[others]
+    n = len(graph['investor_names'])
+    if len(partners) * COUNT_SHARE > n:
+        # Many partners (a hub's): counting into one slot per investor beats sorting them
+        together = np.bincount(partners, minlength=n)
+        ids = np.flatnonzero(together)
+        together, amount = together[ids], np.bincount(partners, weights=amounts, minlength=n)[ids]
+    else:
+        ids, together, amount = _group_sums(partners, np.ones(len(partners)), amounts)
+        together = together.astype(np.int64)
+    if len(ids) > limit:
+        # Only partners with at least the limit-th most deals together can rank; ties all stay in
+        keep = together >= np.partition(together, len(together) - limit)[len(together) - limit]
+        ids, together, amount = ids[keep], together[keep], amount[keep]
+    order = np.lexsort((ids, -amount, -together))[:limit]
+    return ids[order], together[order], amount[order]
+
+
+def co_investor_table(graph, investor, limit=TOP_CO_INVESTORS, mask=None, companies=SHARED_LISTED):
+    """One row per top co-investor: investor, deals and amount together, the number of startups
+    both have backed (shared) and the first few of them by first appearance (companies)."""
+    ids, together, amount = co_investors(graph, investor, limit, mask)
+    own = portfolio(graph, investor, mask)
+    # Entity IDs follow first appearance, so the head of each sorted intersection is the earliest
+    shared = _shared(own, [portfolio(graph, other, mask) for other in ids], len(graph['startup_names']))
+    return pd.DataFrame({'investor': graph['investor_names'][ids], 'deals': together, 'amount': amount,
+                         'shared': [len(startups) for startups in shared],
+                         'companies': [graph['startup_names'][startups[:companies]].tolist() for startups in shared]})
@@ -0,0 +1,111 @@
+"""Turn the raw funding export (startup_funding.csv) into the cleaned schema load_data reads.
+
+The raw file is processed in fixed-size chunks, so memory stays bounded however large the
+export is:
+
+    python ingest.py startup_funding.csv startup_cleaned.csv
+"""
+import argparse
+import logging
+
+import pandas as pd
+
+from data import CLEAN_COLUMNS, REQUIRED_COLUMNS, normalize_dates
+
+logger = logging.getLogger(__name__)
+
+# Raw export header -> cleaned column; headers are matched after collapsing whitespace
+RAW_COLUMNS = {
+    'Date dd/mm/yyyy': 'date',
+    'Startup Name': 'startup',
+    'Industry Vertical': 'vertical',
+    'SubVertical': 'subvertical',
+    'City Location': 'city',
+    'Investors Name': 'investors',
+    'InvestmentnType': 'round',
+    'Amount in USD': 'amount',
+}
+TEXT_COLUMNS = ['startup', 'vertical', 'subvertical', 'city', 'investors', 'round']
+
+# Amounts in the cleaned dataset are INR crores
+USD_TO_INR = 83
+INR_PER_CRORE = 10_000_000
+CHUNK_SIZE = 50_000
+
+# Non-breaking spaces, either real or written out as the literal text \\xc2\\xa0
+NBSP_PATTERN = r'(?:\\+xc2\\+xa0|\xa0)+'
+
+
+def _rename_columns(chunk):
+    headers = {column: ' '.join(column.split()) for column in chunk.columns}
+    chunk = chunk.rename(columns=headers)
+    missing = set(RAW_COLUMNS) - set(chunk.columns)
+    if missing:
+        raise ValueError(f'Raw file is missing columns: {sorted(missing)}')
+    return chunk[list(RAW_COLUMNS)].rename(columns=RAW_COLUMNS)
+
+
+def parse_amounts(amounts, usd_to_inr=USD_TO_INR):
+    """USD amounts with Indian or Western digit grouping -> INR crores; undisclosed amounts become 0."""
+    digits = (amounts.astype('string')
+              .str.replace(NBSP_PATTERN, '', regex=True)
+              .str.replace(r'[,+\s]', '', regex=True))
+    usd = pd.to_numeric(digits, errors='coerce').fillna(0)
+    return usd * usd_to_inr / INR_PER_CRORE
+
+
+def clean_chunk(chunk, usd_to_inr=USD_TO_INR):
+    """One chunk of the raw export in the cleaned schema; rows missing required fields are dropped."""
+    chunk = _rename_columns(chunk)
+
+    for column in TEXT_COLUMNS:
+        chunk[column] = (chunk[column].astype('string')
+                         .str.replace(NBSP_PATTERN, ' ', regex=True)
+                         .str.replace(r'\s+', ' ', regex=True)
+                         .str.strip()
+                         .replace('', pd.NA))
+
+    dates, invalid = normalize_dates(chunk['date'])
+    if not invalid.empty:
+        logger.warning('Dropping %d rows with unparseable dates, e.g. %s', len(invalid), invalid.head(5).tolist())
+    chunk['date'] = dates.dt.strftime('%Y-%m-%d')
+    chunk['amount'] = parse_amounts(chunk['amount'], usd_to_inr)
+
+    complete = chunk[REQUIRED_COLUMNS].notna().all(axis=1)
+    if not complete.all():
+        logger.info('Dropping %d rows with missing required fields', (~complete).sum())
+    return chunk.loc[complete, CLEAN_COLUMNS]
+
+
+def iter_clean_chunks(raw_path, chunksize=CHUNK_SIZE, usd_to_inr=USD_TO_INR):
+    # utf-8-sig: the export starts with a byte-order mark in front of "Sr No"
+    reader = pd.read_csv(raw_path, dtype=str, encoding='utf-8-sig', chunksize=chunksize)
+    for chunk in reader:
+        yield clean_chunk(chunk, usd_to_inr)
+
+
+def ingest(raw_path, clean_path, chunksize=CHUNK_SIZE, usd_to_inr=USD_TO_INR):
+    """Stream raw_path into clean_path chunk by chunk; returns the number of rows written."""
+    rows = 0
+    with open(clean_path, 'w', newline='', encoding='utf-8') as out:
+        for i, chunk in enumerate(iter_clean_chunks(raw_path, chunksize, usd_to_inr)):
+            chunk.to_csv(out, header=(i == 0), index=False)
+            rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('raw_path', help='raw export, e.g. startup_funding.csv')
+    parser.add_argument('clean_path', help='output CSV in the cleaned schema')
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--usd-to-inr', type=float, default=USD_TO_INR)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    rows = ingest(args.raw_path, args.clean_path, args.chunksize, args.usd_to_inr)
+    print(f'Wrote {rows} rows to {args.clean_path}')
+
+
+if __name__ == '__main__':
+    main()
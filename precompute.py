@@ -0,0 +1,140 @@
+"""Precompute the investor and startup detail pages into one report file per entity.
+
+Popular entities would otherwise be recomputed for every visitor. This job builds the dataset
+once, slices each entity's deals in the parent process and fans the report computation out over
+a process pool; each report (analytics.investor_report / startup_report) is pickled to
+
+    reports/<dataset version>-r<REPORT_FORMAT>/<kind>/<entity ID>.pkl
+
+Files are written atomically and existing ones are skipped, so an interrupted run picks up where
+it stopped. Reports for other dataset versions are removed. The pages read the report for the
+current version and fall back to computing it live when it is missing (e.g. right after an append):
+
+    python precompute.py
+    python precompute.py --workers 4 --kind investor
+"""
+import argparse
+import logging
+import os
+import pickle
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from analytics import investor_report, startup_report
+from data import (DATA_PATH, build_dataset, dataset_version, investor_deals, load_deals, similar_startups,
+                  startup_deals, startup_profile)
+from entities import entity_ids
+
+logger = logging.getLogger(__name__)
+
+REPORTS_DIR = DATA_PATH.parent / 'reports'
+KINDS = ('investor', 'startup')
+# Entities per task: enough to amortize pickling the task, few enough to spread evenly over workers
+BATCH_SIZE = 200
+BUILDERS = {'investor': investor_report, 'startup': startup_report}
+# Bumped whenever the report contents change, so pages never read reports of an older layout
+REPORT_FORMAT = 2
+
+
+def _version_dir(version):
+    # Versions contain ':', which not every filesystem accepts in a name
+    return REPORTS_DIR / f"{version.replace(':', '-')}-r{REPORT_FORMAT}"
+
+
+def report_path(version, kind, entity_id):
+    return _version_dir(version) / kind / f'{entity_id}.pkl'
+
+
+def read_report(version, kind, entity_id):
+    """The stored report for an entity in this dataset version, or None if there is none."""
+    if entity_id is None:
+        return None
+    try:
+        with open(report_path(version, kind, entity_id), 'rb') as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_report(version, kind, entity_id, report):
+    path = report_path(version, kind, entity_id)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+    # replace() keeps pages from reading a half-written report
+    os.replace(tmp, path)
+
+
+def _write_batch(version, kind, batch):
+    # Runs in a worker process: batch is [(entity ID, report arguments)]
+    for entity_id, args in batch:
+        write_report(version, kind, entity_id, BUILDERS[kind](*args))
+    return len(batch)
+
+
+def _investor_tasks(dataset):
+    df, investor_index = dataset['df'], dataset['investor_index']
+    for name, entity_id in entity_ids(dataset['investor_aliases']).items():
+        yield entity_id, (investor_deals(df, investor_index, name),)
+
+
+def _startup_tasks(dataset):
+    df, profiles = dataset['df'], dataset['startup_profiles']
+    for name, entity_id in entity_ids(dataset['startup_aliases']).items():
+        profile = startup_profile(profiles, name)
+        vertical = None if profile is None else profile['vertical']
+        similar = similar_startups(dataset['vertical_index'], vertical, name) if pd.notna(vertical) else []
+        yield entity_id, (profile, startup_deals(df, profiles, name), similar)
+
+
+TASKS = {'investor': _investor_tasks, 'startup': _startup_tasks}
+
+
+def _batches(tasks, version, kind):
+    batch = []
+    for entity_id, args in tasks:
+        if report_path(version, kind, entity_id).exists():
+            continue
+        batch.append((entity_id, args))
+        if len(batch) == BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def precompute(csv_path=DATA_PATH, kinds=KINDS, workers=None):
+    """Write every missing report for the current dataset version; returns how many were written."""
+    version = dataset_version(csv_path)
+    for stale in REPORTS_DIR.glob('*'):
+        if stale != _version_dir(version):
+            shutil.rmtree(stale, ignore_errors=True)
+    dataset = build_dataset(load_deals(csv_path), version)
+
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for kind in kinds:
+            report_path(version, kind, 0).parent.mkdir(parents=True, exist_ok=True)
+            futures = [pool.submit(_write_batch, version, kind, batch)
+                       for batch in _batches(TASKS[kind](dataset), version, kind)]
+            for future in as_completed(futures):
+                written += future.result()
+            logger.info('%s reports up to date for version %s', kind, version)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute investor and startup detail reports')
+    parser.add_argument('--kind', choices=KINDS, action='append', help='only this kind of report (repeatable)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    written = precompute(kinds=args.kind or KINDS, workers=args.workers)
+    logger.info('Wrote %d reports', written)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Opt-in per-section timing for the dashboard pages.
+
+Enable it for every session with DASHBOARD_PROFILE=1, or with DASHBOARD_PROFILE=query for the
+sessions opened with ?profile=1 only; without the variable the query parameter does nothing, so
+visitors cannot make the server write. Each wrapped section records wall time, rows touched and
+payload bytes. The records are shown in a sidebar panel, appended as JSON lines to
+DASHBOARD_PROFILE_LOG (default profile.jsonl, rotated to profile.jsonl.1 past
+DASHBOARD_PROFILE_LOG_MB megabytes, default 10), and accumulated into Prometheus counters in
+DASHBOARD_PROFILE_PROM (default profile.prom, textfile-collector format).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+import streamlit as st
+
+from charts import figure_payload_bytes
+
+ENV_VAR = 'DASHBOARD_PROFILE'
+QUERY_PARAM = 'profile'
+LOG_PATH = os.environ.get('DASHBOARD_PROFILE_LOG', 'profile.jsonl')
+LOG_MAX_BYTES = int(float(os.environ.get('DASHBOARD_PROFILE_LOG_MB', 10)) * 2 ** 20)
+PROM_PATH = os.environ.get('DASHBOARD_PROFILE_PROM', 'profile.prom')
+
+# Process-wide counters shared by every session: section -> metric -> total
+_counters = defaultdict(lambda: defaultdict(float))
+_lock = threading.Lock()
+_log = None
+
+
+def enabled():
+    switch = os.environ.get(ENV_VAR)
+    return switch == '1' or (switch == 'query' and st.query_params.get(QUERY_PARAM) == '1')
+
+
+def payload_bytes(obj):
+    # Roughly what each element sends to the browser
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, str):
+        return len(obj.encode())
+    return figure_payload_bytes(obj)
+
+
+class Section:
+    def __init__(self, name, rows):
+        self.record = {'section': name, 'rows': rows, 'payload_bytes': 0, 'seconds': 0.0}
+
+    def rows(self, rows):
+        self.record['rows'] = rows
+
+    def payload(self, obj):
+        self.record['payload_bytes'] += payload_bytes(obj)
+        return obj
+
+
+class _NullSection:
+    # Stand-in when profiling is off, so wrapped code never pays for payload measurement
+
+    def rows(self, rows):
+        pass
+
+    def payload(self, obj):
+        return obj
+
+
+def _prometheus_text():
+    lines = []
+    for metric, help_text in [('seconds', 'Wall time spent in the section'),
+                              ('calls', 'Times the section ran'),
+                              ('rows', 'Rows touched by the section'),
+                              ('payload_bytes', 'Bytes the section sent to the browser')]:
+        name = f'dashboard_section_{metric}_total'
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{{section="{section}"}} {totals[metric]:g}' for section, totals in sorted(_counters.items())]
+    return '\n'.join(lines) + '\n'
+
+
+def _record_log():
+    # One JSON line per record; the file is rotated rather than left to grow (called under _lock)
+    global _log
+    if _log is None:
+        handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=1)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        _log = logging.getLogger(f'{__name__}.records')
+        _log.setLevel(logging.INFO)
+        _log.propagate = False
+        _log.addHandler(handler)
+    return _log
+
+
+def _export(record):
+    with _lock:
+        totals = _counters[record['section']]
+        totals['seconds'] += record['seconds']
+        totals['calls'] += 1
+        totals['rows'] += record['rows']
+        totals['payload_bytes'] += record['payload_bytes']
+
+        _record_log().info(json.dumps({'ts': time.time(), **record}))
+        # Write-then-rename so a scraper never reads a half-written file
+        with open(PROM_PATH + '.tmp', 'w') as prom:
+            prom.write(_prometheus_text())
+        os.replace(PROM_PATH + '.tmp', PROM_PATH)
+
+
+def start_run():
+    # Records shown in the panel cover the current rerun only
+    if enabled():
+        st.session_state['profile_records'] = []
+
+
+@contextmanager
+def section(name, rows=0):
+    """Time the wrapped block as `name`; yields an object to report rows and payloads on."""
+    if not enabled():
+        yield _NullSection()
+        return
+
+    current = Section(name, rows)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.record['seconds'] = time.perf_counter() - start
+        st.session_state.setdefault('profile_records', []).append(current.record)
+        _export(current.record)
+
+
+def render_panel():
+    if not enabled():
+        return
+    records = st.session_state.get('profile_records', [])
+    with st.sidebar.expander('⏱️ Section Timings', expanded=True):
+        if not records:
+            st.write('No sections ran on this rerun.')
+            return
+        timings = pd.DataFrame(records)
+        timings['ms'] = (timings.pop('seconds') * 1000).round(1)
+        st.dataframe(timings, hide_index=True)
+        st.caption(f'Also written to {LOG_PATH} and {PROM_PATH}')
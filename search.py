@@ -0,0 +1,111 @@
+"""Typo-tolerant prefix search over startup and investor names.
+
+Names are reduced to a normalized key (case, accents, punctuation and spacing dropped, so
+"BYJU'S", "Byju’s" and "Byjus" share the key "byjus"). A name index holds the sorted keys for
+prefix lookups and a trigram posting list per key for fuzzy matches. A query finds its prefix
+matches by binary search and counts shared trigrams over its trigrams' posting lists only, but
+keeps the scores in arrays over the whole vocabulary, so each query also does a few O(names)
+vectorized passes. That is cheaper than sorting the hits, as common trigrams ("inv", "ven") put
+most names on some posting list: about 4 ms for a broad query over 110k names.
+"""
+import bisect
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+# Matches shown under the search box
+TOP_K = 10
+# Fuzzy matches must share at least this fraction of the query's trigrams
+MIN_COVERAGE = 0.5
+_WORD = re.compile(r'[0-9a-z]+')
+# Bytes the export wrote out as literal escapes, e.g. "Byju\\xe2\\x80\\x99s"
+_LITERAL_ESCAPES = re.compile(r'(?:\\+x[0-9a-fA-F]{2})+')
+
+
+def name_tokens(name):
+    """The lower-case ASCII words of name, with accents, punctuation and literal escapes dropped."""
+    decomposed = unicodedata.normalize('NFKD', _LITERAL_ESCAPES.sub('', str(name)))
+    ascii_only = decomposed.encode('ascii', 'ignore').decode()
+    return _WORD.findall(ascii_only.casefold())
+
+
+def normalize_name(name):
+    """Lower-case ASCII letters and digits only: the form names are matched and grouped on."""
+    return ''.join(name_tokens(name))
+
+
+def trigrams(key):
+    # Padded so short keys and the first and last letters still count
+    padded = f'^{key}$'
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def build_name_index(names, labels=None):
+    """Search structures for names (a list); matches are returned as the matching names' labels.
+
+    Labels default to the names themselves; passing each alias's canonical name lets any spelling
+    find its entity.
+    """
+    keys = [normalize_name(name) for name in names]
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+
+    postings = defaultdict(list)
+    sizes = np.empty(len(keys), dtype=np.int32)
+    for i, key in enumerate(keys):
+        grams = trigrams(key)
+        sizes[i] = len(grams)
+        for gram in grams:
+            postings[gram].append(i)
+
+    return {
+        'names': list(names),
+        'labels': list(names if labels is None else labels),
+        'sorted_keys': [keys[i] for i in order],
+        'sorted_ids': np.array(order, dtype=np.int64),
+        'postings': {gram: np.array(ids, dtype=np.int64) for gram, ids in postings.items()},
+        'sizes': sizes,
+    }
+
+
+def search_names(index, query, k=TOP_K):
+    """Up to k names for query: prefix matches first, then the closest by trigram similarity."""
+    key = normalize_name(query)
+    if not key:
+        return []
+    n = len(index['names'])
+    scores = np.zeros(n)
+
+    # Every name whose key starts with the query, ahead of any fuzzy match
+    lo = bisect.bisect_left(index['sorted_keys'], key)
+    hi = bisect.bisect_left(index['sorted_keys'], key + '\x7f')
+    scores[index['sorted_ids'][lo:hi]] = 3.0
+
+    grams = trigrams(key)
+    hits = [index['postings'][gram] for gram in grams if gram in index['postings']]
+    if hits:
+        shared = np.bincount(np.concatenate(hits), minlength=n)
+        coverage = shared / len(grams)
+        # Among names covering the query equally, the one closest in length ranks first
+        similarity = coverage + shared / (len(grams) + index['sizes'] - shared)
+        similarity[coverage < MIN_COVERAGE] = 0
+        scores += similarity
+
+    candidates = np.flatnonzero(scores)
+    # Several spellings can share a label, so keep spare candidates for the de-duplication below
+    shortlist = k * 4
+    if len(candidates) > shortlist:
+        candidates = candidates[np.argpartition(-scores[candidates], shortlist - 1)[:shortlist]]
+    # Best score first; ties in name order so results don't shuffle between reruns
+    candidates = sorted(candidates, key=lambda i: (-scores[i], index['names'][i]))
+    return list(dict.fromkeys(index['labels'][i] for i in candidates))[:k]
+
+
+def exact_match(index, name):
+    """The label of a name equal to name up to case, accents and punctuation, or None."""
+    key = normalize_name(name)
+    i = bisect.bisect_left(index['sorted_keys'], key)
+    if key and i < len(index['sorted_keys']) and index['sorted_keys'][i] == key:
+        return index['labels'][index['sorted_ids'][i]]
+    return None
@@ -0,0 +1,255 @@
+"""What the dashboard pages show, as plain data, for the pages and the HTTP API (api.py).
+
+Every function takes the served source: the in-memory dataset (data.current_dataset, the default)
+or the SQL store (sqlstore.current_store, with DASHBOARD_BACKEND=sqlite). Filters are the sidebar
+filters (filters.NO_FILTERS for none); mask is their row mask on the pandas backend (filter_mask).
+
+Results per dataset version are shared resources; results per filter combination or entity go to
+the bounded LRU caches of caching.py, so a page view and an API request for the same thing share
+one computation. Underscored arguments are the inputs for that version and are not part of the key.
+"""
+import pandas as pd
+import streamlit as st
+
+from analytics import investor_summary, investor_totals, startup_report
+from caching import MB, shared_cache
+from cube import filtered_aggregates
+import data
+from entities import entity_ids
+import filters as deal_filters
+from graph import co_investor_table
+from precompute import read_report
+from search import build_name_index, exact_match
+import sqlstore
+
+# Dataset versions whose per-version resources are kept: the served one, the one it is being
+# replaced by, and the uploaded files sessions are analyzing
+VERSIONS_KEPT = 2 + data.UPLOADS_KEPT
+
+
+def current_source():
+    return sqlstore.current_store() if sqlstore.enabled() else data.current_dataset()
+
+
+def uses_store(source):
+    # A dataset holds the deals; a store only the path of its database
+    return 'df' not in source
+
+
+def source_rows(source):
+    return source['rows'] if uses_store(source) else len(source['df'])
+
+
+@st.cache_resource(max_entries=2)
+def _store_summary(version, _store):
+    # Overall aggregates and the alias tables only change with the store version
+    return sqlstore.overall_aggregates(_store), sqlstore.investor_aliases(_store), sqlstore.startup_aliases(_store)
+
+
+def summary(source):
+    """(unfiltered overall aggregates, investor aliases, startup aliases) of the source."""
+    if uses_store(source):
+        return _store_summary(source['version'], source)
+    return source['aggregates'], source['investor_aliases'], source['startup_aliases']
+
+
+def aliases(source, kind):
+    _, investor_aliases, startup_aliases = summary(source)
+    return investor_aliases if kind == 'investor' else startup_aliases
+
+
+@st.cache_resource(max_entries=VERSIONS_KEPT)
+def _name_indexes(version, _investor_aliases, _startup_aliases):
+    # Every spelling is searchable and resolves to its canonical name; shared by every session,
+    # not copied per caller, and rebuilt only when the dataset version changes
+    return {
+        'investor': build_name_index(_investor_aliases.index.tolist(), _investor_aliases['canonical'].tolist()),
+        'startup': build_name_index(_startup_aliases.index.tolist(), _startup_aliases['canonical'].tolist()),
+    }
+
+
+def name_indexes(source):
+    _, investor_aliases, startup_aliases = summary(source)
+    return _name_indexes(source['version'], investor_aliases, startup_aliases)
+
+
+@st.cache_resource(max_entries=VERSIONS_KEPT)
+def _entity_ids(version, _investor_aliases, _startup_aliases):
+    # Canonical name -> entity ID, the key of the precomputed reports (precompute.py)
+    return {'investor': entity_ids(_investor_aliases), 'startup': entity_ids(_startup_aliases)}
+
+
+@st.cache_resource(max_entries=2 * VERSIONS_KEPT)
+def _entity_names(version, kind, _entity_ids):
+    return sorted(_entity_ids)
+
+
+def entity_names(source, kind):
+    """Every canonical investor or startup name, sorted."""
+    return _entity_names(source['version'], kind, _entity_ids_of(source)[kind])
+
+
+def canonical_name(source, kind, name):
+    """The canonical name of the entity spelled name (exactly, or else up to case, accents and
+    punctuation), or None if no entity is known under it."""
+    canonical = aliases(source, kind)['canonical'].get(name)
+    return canonical if canonical is not None else exact_match(name_indexes(source)[kind], name)
+
+
+def _entity_ids_of(source):
+    _, investor_aliases, startup_aliases = summary(source)
+    return _entity_ids(source['version'], investor_aliases, startup_aliases)
+
+
+@st.cache_resource(max_entries=VERSIONS_KEPT)
+def _filter_options(version, _source):
+    if uses_store(_source):
+        return sqlstore.filter_options(_source)
+    return deal_filters.filter_options(_source['filter_index'])
+
+
+def filter_options(source):
+    return _filter_options(source['version'], source)
+
+
+@shared_cache('filter_masks', max_entries=16, max_bytes=64 * MB)
+def _filter_mask(version, filters, _filter_index):
+    # One row mask per filter combination, shared by every section and session that uses it
+    return deal_filters.filter_mask(_filter_index, filters)
+
+
+def filter_mask(source, filters):
+    """The row mask of filters on the pandas backend; None when nothing is filtered or SQL filters."""
+    if uses_store(source) or not deal_filters.is_active(filters):
+        return None
+    return _filter_mask(source['version'], filters, source['filter_index'])
+
+
+@shared_cache('filtered_overall', max_entries=64, max_bytes=64 * MB)
+def _filtered_overall(version, filters, _source, _mask):
+    # Rolled up from the aggregate cube (cube.py), or aggregated by the SQL store
+    if uses_store(_source):
+        return sqlstore.overall_aggregates(_source, filters)
+    return filtered_aggregates(_source['cube'], _source['df'], _source['filter_index'], _mask, filters)
+
+
+def overall(source, filters, mask=None):
+    """Everything the Overall Analysis page shows (analytics.summarize_overall) under filters."""
+    if not deal_filters.is_active(filters):
+        return summary(source)[0]
+    return _filtered_overall(source['version'], filters, source, mask)
+
+
+# Only needed while an investor page's charts are computed from them (their totals have caches of
+# their own), so few are kept; bounded by count, as their categoricals share the categories of the
+# whole dataset, which sizing them would count every time
+@shared_cache('investor_deals', max_entries=8, max_bytes=None, ttl=600)
+def _investor_deals(version, filters, investor_name, _source, _mask):
+    if uses_store(_source):
+        return sqlstore.investor_deals(_source, investor_name, filters)
+    return data.investor_deals(_source['df'], _source['investor_index'], investor_name, _mask)
+
+
+def investor_deals(source, investor_name, filters, mask=None):
+    return _investor_deals(source['version'], filters, investor_name, source, mask)
+
+
+def startup_deals(source, startup, filters, mask=None):
+    if uses_store(source):
+        return sqlstore.startup_deals(source, startup, filters)
+    return data.startup_deals(source['df'], source['startup_profiles'], startup, mask)
+
+
+def _live_report(source, kind, name, filters, mask):
+    if kind == 'investor':
+        # Only the top of the page; the chart totals are computed by investor_table
+        deals = investor_deals(source, name, filters, mask)
+        return investor_summary(deals) if not deals.empty else {'deals': 0}
+    if uses_store(source):
+        profile = sqlstore.startup_profile(source, name)
+    else:
+        profile = data.startup_profile(source['startup_profiles'], name)
+    # Similar companies are looked up by similar_startups
+    return startup_report(profile, startup_deals(source, name, filters, mask), None)
+
+
+@shared_cache('entity_reports', max_entries=1024, max_bytes=128 * MB, ttl=3600)
+def _report(version, filters, kind, name, _source, _mask):
+    # Precomputed reports cover every deal, so filtered views are always computed
+    if not deal_filters.is_active(filters):
+        report = read_report(version, kind, _entity_ids_of(_source)[kind].get(name))
+        if report is not None:
+            return report
+    return _live_report(_source, kind, name, filters, _mask)
+
+
+def report(source, kind, name, filters, mask=None):
+    """The investor or startup report: precomputed for this dataset version, or computed now.
+
+    Live reports leave out the investor chart totals and the similar companies (startup 'similar'
+    is None); see investor_table and similar_startups.
+    """
+    return _report(source['version'], filters, kind, name, source, mask)
+
+
+@shared_cache('investor_tables', max_entries=1024, max_bytes=64 * MB, ttl=3600)
+def _investor_table(version, filters, investor_name, table, _deals):
+    return investor_totals(_deals(), table)
+
+
+def investor_table(source, investor_name, table, filters, report, deals):
+    """The analytics.INVESTOR_TOTALS table of the investor's report; deals() fetches the deals when
+    the report doesn't carry it."""
+    if table in report:
+        return report[table]
+    return _investor_table(source['version'], filters, investor_name, table, deals)
+
+
+@shared_cache('similar_startups', max_entries=1024, max_bytes=16 * MB, ttl=3600)
+def _similar_startups(version, filters, startup, vertical, _source, _mask):
+    if uses_store(_source):
+        return sqlstore.similar_startups(_source, vertical, startup, filters=filters)
+    if _mask is not None:
+        return deal_filters.similar_startups(_source['df'], _source['filter_index'], _mask, vertical, startup)
+    return data.similar_startups(_source['vertical_index'], vertical, startup)
+
+
+def similar_startups(source, startup, vertical, filters, mask=None):
+    """Other startups in the same vertical, up to 5."""
+    if pd.isna(vertical):
+        return []
+    return _similar_startups(source['version'], filters, startup, vertical, source, mask)
+
+
+@st.cache_resource(max_entries=2)
+def _store_graph(version, _store):
+    return sqlstore.coinvestment_graph(_store)
+
+
+def coinvestment(source):
+    """The co-investment graph (graph.py) of the source's deals."""
+    if uses_store(source):
+        return _store_graph(source['version'], source)
+    return source['coinvestment']
+
+
+@shared_cache('store_filter_masks', max_entries=16, max_bytes=64 * MB)
+def _store_filter_mask(version, filters, _store):
+    # The graph answers filtered queries from a row mask, which the SQL path otherwise never needs
+    return sqlstore.filter_mask(_store, filters)
+
+
+@shared_cache('co_investors', max_entries=1024, max_bytes=16 * MB, ttl=3600)
+def _co_investors(version, filters, investor_name, _source, _mask):
+    investor = _entity_ids_of(_source)['investor'].get(investor_name)
+    if investor is None:
+        return pd.DataFrame({column: [] for column in ['investor', 'deals', 'amount', 'shared', 'companies']})
+    if uses_store(_source) and deal_filters.is_active(filters):
+        _mask = _store_filter_mask(version, filters, _source)
+    return co_investor_table(coinvestment(_source), investor, mask=_mask)
+
+
+def co_investors(source, investor_name, filters, mask=None):
+    """The investor's top co-investors in the deals passing filters (graph.co_investor_table); no
+    rows for an investor the source doesn't know."""
+    return _co_investors(source['version'], filters, investor_name, source, mask)
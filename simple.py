@@ -1,43 +1,28 @@
 import streamlit as st
-import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.express as px
 
+from data import investor_deals, load_data, load_investor_names
+
 # Set the Streamlit page configuration
 st.set_page_config(layout='wide', page_title='StartUp Analysis')
 
-# Load and preprocess the data
-df = pd.read_csv("startup_cleaned (1).csv")
-def fix_year(date_str):
-    # Check if the date string has exactly two '/' characters
-    if date_str.count("/") == 2:
-        parts = date_str.split("/")
-        if len(parts[2]) == 3:  # If the year has only 3 digits, fix it
-            parts[2] = parts[2].zfill(4)  # Pad the year with a leading zero
-        return "/".join(parts)
-    else:
-        return date_str  # Return the date as is if it's not in the expected format
-
-# Apply the function to fix the date format in the DataFrame
-df['date'] = df['date'].apply(fix_year)
-
-# Convert the date column to datetime with dayfirst=True
-df['date'] = pd.to_datetime(df['date'], dayfirst=True, errors='coerce')
-df['year'] = df['date'].dt.year
-df['month'] = df['date'].dt.month
+# Load the cleaned data from the shared, cached data layer instead of reparsing on every rerun
+df, investor_index = load_data()
 
 def load_investor_detail(invest):
     st.title(invest)
     # Load the recent 5 investments of the investor
     name = invest
-    last5_df = df[df['investors'].str.contains(name, na=False)].sort_values(by='date', ascending=False).head()[[
+    investor_df = investor_deals(df, investor_index, name)
+    last5_df = investor_df.sort_values(by='date', ascending=False).head()[[
         'date', 'startup', 'city', 'vertical', 'round', 'amount'
     ]]
     st.subheader('Most Recent Investment')
     st.dataframe(last5_df)
 
     # Biggest Investment
-    big_series = df[df['investors'].str.contains(name, na=False)].groupby('startup')['amount'].sum().sort_values(ascending=False)
+    big_series = investor_df.groupby('startup', observed=True)['amount'].sum().sort_values(ascending=False)
     col1, col2 = st.columns(2)
 
     with col1:
@@ -66,7 +51,7 @@ def load_investor_detail(invest):
         # st.pyplot(fig)
 
     with col2:
-        vertical_series = df[df['investors'].str.contains(name, na=False)].groupby('vertical')['amount'].sum()
+        vertical_series = investor_df.groupby('vertical', observed=True)['amount'].sum()
         st.subheader('Sector Invested in')
 
         vertical_investments_df = vertical_series.reset_index()
@@ -87,10 +72,9 @@ def load_investor_detail(invest):
         # st.pyplot(fig2)
 
     # YOY Investment
-    df['year'] = df['date'].dt.year
 
     # Filter the DataFrame and group by year to get the total investment
-    year_series = df[df['investors'].str.contains(name, na=False)].groupby('year')['amount'].sum().reset_index()
+    year_series = investor_df.groupby('year')['amount'].sum().reset_index()
 
     # Create a subheader for the graph
     st.subheader('YOY Investment')
@@ -111,7 +95,7 @@ def load_investor_detail(invest):
 
     def find_similar_investors(df, investor_name):
         # Get the unique sectors where the specified investor has invested
-        sectors = list(set(df[df['investors'].str.contains(investor_name, na=False)]['vertical']))
+        sectors = list(set(investor_deals(df, investor_index, investor_name)['vertical']))
         if not sectors:
             st.write(f"No sectors found for the investor '{investor_name}'.")
             # print(f"No sectors found for the investor '{investor_name}'.")
@@ -173,10 +157,10 @@ def load_overall_analysis():
         st.metric('Total', str(total)+' Cr')
     with col2:
         # Max amount infused in a start
-        maximum_fund = df.groupby('startup')['amount'].max().sort_values(ascending = False).head(1).values[0]
+        maximum_fund = df.groupby('startup', observed=True)['amount'].max().sort_values(ascending = False).head(1).values[0]
         st.metric('Maximum Funing',str(maximum_fund)+' Cr')
     with col3:
-        mean_fund = round(df.groupby('startup')['amount'].sum().mean())
+        mean_fund = round(df.groupby('startup', observed=True)['amount'].sum().mean())
         st.metric('Mean Funing', str(mean_fund) + ' Cr')
     with col4:
         num_startup= df['startup'].nunique()
@@ -234,7 +218,7 @@ def load_overall_analysis():
     st.header("Funding Types:")
     st.write(cleaned_types)
 
-    city_date_counts = df.groupby('city')['date'].count().reset_index()
+    city_date_counts = df.groupby('city', observed=True)['date'].count().reset_index()
 
     # Rename the columns for clarity
     city_date_counts.columns = ['City', 'Date Count']
@@ -267,7 +251,7 @@ elif option == 'StartUp':
     btn1 = st.sidebar.button('Find StartUp Details')
     st.title('StartUp Analysis')
 else :
-    selected_investor = st.sidebar.selectbox('Select Funding',sorted(set(df['investors'].str.split(',').sum())))
+    selected_investor = st.sidebar.selectbox('Select Funding',load_investor_names())
     btn2  = st.sidebar.button('Find Investor Detail')
 
     if btn2:
@@ -0,0 +1,363 @@
+"""Optional embedded SQLite backend for the dashboard pages.
+
+Enable it with DASHBOARD_BACKEND=sqlite. The cleaned deals are loaded once into a database file
+next to the CSV ("startup_cleaned (1).sqlite"), with one row per deal plus one row per
+(deal, investor) pair, indexed on startup, investor, city, vertical and date. Names are stored
+canonicalized, with the same alias tables as the pandas path (entities.py). The pages then run
+aggregates and lookups as SQL and only fetch result rows, so the server never holds the whole
+frame. The in-memory pandas path in data.py stays the default; both return the same results,
+which benchmarks/backend_parity.py checks against the bundled CSV.
+"""
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import TOP_INVESTORS, summarize_overall
+from data import DATA_PATH, add_date_columns, append_to_csv, clean_deals, dataset_version, split_investors
+from entities import INVESTOR_WORDS, LEGAL_WORDS, resolve_aliases
+from filters import FILTER_COLUMNS, is_active
+from graph import build_graph, entity_names
+
+ENV_VAR = 'DASHBOARD_BACKEND'
+# Rows read from the CSV per batch while the store is built
+CHUNK_SIZE = 50_000
+
+SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE deals (
+    id INTEGER PRIMARY KEY,  -- row position in the CSV, so ordering by id is the pandas row order
+    date TEXT,               -- ISO yyyy-mm-dd; NULL when the date could not be parsed
+    startup TEXT, vertical TEXT, subvertical TEXT, city TEXT, investors TEXT, round TEXT,
+    amount REAL, year INTEGER, month INTEGER,
+    startup_id INTEGER
+);
+CREATE TABLE deal_investors (deal_id INTEGER NOT NULL, investor TEXT NOT NULL, investor_id INTEGER);
+CREATE TABLE startup_aliases (alias TEXT PRIMARY KEY, entity_id INTEGER NOT NULL, canonical TEXT NOT NULL,
+                              rows INTEGER NOT NULL);
+CREATE TABLE investor_aliases (alias TEXT PRIMARY KEY, entity_id INTEGER NOT NULL, canonical TEXT NOT NULL,
+                               rows INTEGER NOT NULL);
+"""
+# Created after the bulk load, which is much faster than maintaining them row by row
+INDEXES = """
+CREATE INDEX deals_startup ON deals (startup);
+CREATE INDEX deals_city ON deals (city);
+CREATE INDEX deals_vertical ON deals (vertical);
+CREATE INDEX deals_round ON deals (round);
+CREATE INDEX deals_date ON deals (date);
+CREATE INDEX deals_year_month ON deals (year, month);
+CREATE INDEX deal_investors_investor ON deal_investors (investor, deal_id);
+"""
+TEXT_COLUMNS = ['startup', 'vertical', 'subvertical', 'city', 'investors', 'round']
+DEAL_COLUMNS = 'date, startup, vertical, subvertical, city, investors, round, amount, year, month'
+# Names are inserted as written, then resolved like data.build_dataset does and relabelled in place:
+# alias table -> (words ignored when matching, whether person-like names are strict, name counts in
+# first-seen order, relabelling)
+ALIAS_TABLES = {
+    'startup_aliases': (
+        LEGAL_WORDS, False,
+        'SELECT startup, COUNT(*) FROM deals WHERE id >= ? AND startup IS NOT NULL GROUP BY startup ORDER BY MIN(id)',
+        'UPDATE deals SET startup = a.canonical, startup_id = a.entity_id FROM startup_aliases a '
+        'WHERE a.alias = deals.startup AND deals.id >= ?',
+    ),
+    'investor_aliases': (
+        INVESTOR_WORDS, True,
+        'SELECT investor, COUNT(*) FROM deal_investors WHERE deal_id >= ? GROUP BY investor ORDER BY MIN(rowid)',
+        'UPDATE deal_investors SET investor = a.canonical, investor_id = a.entity_id FROM investor_aliases a '
+        'WHERE a.alias = deal_investors.investor AND deal_investors.deal_id >= ?',
+    ),
+}
+
+
+def enabled():
+    return os.environ.get(ENV_VAR) == 'sqlite'
+
+
+def store_path(csv_path):
+    # Sits next to the CSV, like the Feather snapshot
+    return Path(csv_path).with_suffix('.sqlite')
+
+
+def _connect(path):
+    return closing(sqlite3.connect(path))
+
+
+def _insert_deals(conn, deals, offset):
+    rows = deals.assign(date=deals['date'].dt.strftime('%Y-%m-%d'),
+                        year=deals['year'].astype('Int64'), month=deals['month'].astype('Int64'))
+    rows = rows[DEAL_COLUMNS.split(', ')].astype(object)
+    rows = rows.where(rows.notna(), None)
+    rows.insert(0, 'id', range(offset, offset + len(rows)))
+    conn.executemany(f'INSERT INTO deals (id, {DEAL_COLUMNS}) VALUES ({", ".join("?" * 11)})',
+                     rows.itertuples(index=False, name=None))
+
+    investors = split_investors(deals['investors'])
+    conn.executemany('INSERT INTO deal_investors (deal_id, investor) VALUES (?, ?)',
+                     zip((investors.index + offset).tolist(), investors.tolist()))
+
+
+def _read_aliases(conn, table):
+    return pd.read_sql_query(f'SELECT alias, entity_id, canonical, rows FROM {table} ORDER BY rowid', conn,
+                             index_col='alias')
+
+
+def _canonicalize(conn, first_id):
+    # Resolve the names on deals from first_id on against the stored alias tables, then relabel those deals
+    for table, (stop_words, people, counts_sql, relabel_sql) in ALIAS_TABLES.items():
+        counts = pd.Series(dict(conn.execute(counts_sql, (first_id,))), dtype='int64')
+        aliases = resolve_aliases(counts, stop_words, _read_aliases(conn, table) if first_id else None, people)
+        conn.execute(f'DELETE FROM {table}')
+        conn.executemany(f'INSERT INTO {table} VALUES (?, ?, ?, ?)',
+                         aliases.reset_index().astype(object).itertuples(index=False, name=None))
+        conn.execute(relabel_sql, (first_id,))
+
+
+def _set_meta(conn, version, rows):
+    conn.executemany('INSERT OR REPLACE INTO meta VALUES (?, ?)', [('version', version), ('rows', str(rows))])
+
+
+def _read_meta(path):
+    if not path.exists():
+        return {}
+    try:
+        with _connect(path) as conn:
+            return dict(conn.execute('SELECT key, value FROM meta'))
+    except sqlite3.DatabaseError:
+        return {}
+
+
+def build_store(csv_path, path):
+    """Load csv_path into a fresh database at path, a chunk at a time; returns the row count."""
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.unlink(missing_ok=True)
+    rows = 0
+    with _connect(tmp) as conn:
+        conn.executescript(SCHEMA)
+        # Same parsing as read_clean_csv, so rows with unparseable dates are kept as they are there
+        for chunk in pd.read_csv(csv_path, chunksize=CHUNK_SIZE):
+            chunk = chunk.reset_index(drop=True)
+            add_date_columns(chunk)
+            _insert_deals(conn, chunk, rows)
+            rows += len(chunk)
+        _canonicalize(conn, 0)
+        conn.executescript(INDEXES)
+        _set_meta(conn, dataset_version(csv_path), rows)
+        conn.commit()
+    # replace() keeps sessions from opening a half-built store
+    os.replace(tmp, path)
+    return rows
+
+
+def open_store(csv_path):
+    """The store for csv_path, rebuilt first when the CSV or the cleaning rules changed."""
+    path = store_path(csv_path)
+    version = dataset_version(csv_path)
+    meta = _read_meta(path)
+    if meta.get('version') == version:
+        rows = int(meta['rows'])
+    else:
+        rows = build_store(csv_path, path)
+    return {'path': str(path), 'version': version, 'rows': rows}
+
+
+@st.cache_resource
+def _store_holder():
+    return {'store': open_store(DATA_PATH), 'lock': threading.Lock()}
+
+
+def current_store():
+    return _store_holder()['store']
+
+
+def _query(store, sql, params=()):
+    with _connect(store['path']) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def _deals_frame(frame):
+    # Same dtypes the figure builders and tables expect from the pandas path
+    frame['date'] = pd.to_datetime(frame['date'], format='%Y-%m-%d')
+    return frame.astype({column: 'str' for column in TEXT_COLUMNS})
+
+
+def _deals_source(filters):
+    # The deals table, or the rows passing the sidebar filters (filters.py); SQLite flattens the
+    # subquery, so lookups still use the indexes
+    if filters is None or not is_active(filters):
+        return 'deals', []
+    clauses, params = [], []
+    if filters['dates']:
+        clauses.append('date BETWEEN ? AND ?')
+        params += [day.isoformat() for day in filters['dates']]
+    for column in FILTER_COLUMNS:
+        if filters[column]:
+            clauses.append(f'{column} IN ({", ".join("?" * len(filters[column]))})')
+            params += list(filters[column])
+    return f'(SELECT * FROM deals WHERE {" AND ".join(clauses)}) AS deals', params
+
+
+def filter_options(store):
+    """filters.filter_options for the store: the date span and every city, vertical and round."""
+    span = _query(store, 'SELECT MIN(date) AS first, MAX(date) AS last FROM deals').iloc[0]
+    options = {'dates': None if span.isna().any() else
+               (pd.Timestamp(span['first']).date(), pd.Timestamp(span['last']).date())}
+    for column in FILTER_COLUMNS:
+        options[column] = _query(store, f'SELECT DISTINCT {column} AS value FROM deals '
+                                        f'WHERE {column} IS NOT NULL ORDER BY value')['value'].tolist()
+    return options
+
+
+def overall_aggregates(store, filters=None):
+    """analytics.overall_aggregates, computed by SQL; only group-level rows leave the database."""
+    deals, params = _deals_source(filters)
+    totals = _query(store, 'SELECT TOTAL(amount) AS total, MAX(amount) AS max_amount, '
+                           f'COUNT(DISTINCT startup) AS num_startups FROM {deals}', params).iloc[0]
+    monthly = _query(store, f'SELECT year, month, TOTAL(amount) AS sum, COUNT(amount) AS count FROM {deals} '
+                            'WHERE year IS NOT NULL GROUP BY year, month ORDER BY year, month', params)
+    rounds = _query(store, f'SELECT round FROM {deals} GROUP BY round ORDER BY MIN(id)', params)
+    city_counts = _query(store, f'SELECT city, COUNT(date) AS count FROM {deals} WHERE city IS NOT NULL '
+                                'GROUP BY city ORDER BY city', params)
+    # Earliest deal wins ties, as idxmax does
+    yearly_top = _query(store, 'SELECT year, startup, amount FROM ('
+                               '  SELECT year, startup, amount, '
+                               '         ROW_NUMBER() OVER (PARTITION BY year ORDER BY amount DESC, id) AS rank '
+                               f'  FROM {deals} WHERE year IS NOT NULL) '
+                               'WHERE rank = 1 ORDER BY year', params)
+    # summarize_overall only shows the top 5, so that is all that is fetched
+    top_investors = _query(store, f'SELECT investors, TOTAL(amount) AS amount FROM {deals} '
+                                  'WHERE investors IS NOT NULL GROUP BY investors ORDER BY amount DESC, investors '
+                                  f'LIMIT {TOP_INVESTORS}',
+                           params)
+
+    partials = {
+        'total': float(totals['total']),
+        # NULL when no deal passes the filters; NaN, as max() over no rows gives
+        'max_amount': float('nan') if pd.isna(totals['max_amount']) else totals['max_amount'],
+        'monthly': monthly.set_index(['year', 'month']),
+        'rounds': rounds['round'].tolist(),
+        'city_counts': city_counts.set_index('city')['count'],
+        'yearly_top': yearly_top.set_index('year'),
+        'investor_totals': top_investors.set_index('investors')['amount'],
+    }
+    return summarize_overall(partials, int(totals['num_startups']))
+
+
+def startup_aliases(store):
+    with _connect(store['path']) as conn:
+        return _read_aliases(conn, 'startup_aliases')
+
+
+def investor_aliases(store):
+    with _connect(store['path']) as conn:
+        return _read_aliases(conn, 'investor_aliases')
+
+
+def investor_names(store):
+    return _query(store, 'SELECT DISTINCT investor FROM deal_investors ORDER BY investor')['investor'].tolist()
+
+
+def startup_names(store):
+    return _query(store, 'SELECT DISTINCT startup FROM deals WHERE startup IS NOT NULL ORDER BY startup')[
+        'startup'].tolist()
+
+
+def investor_deals(store, investor_name, filters=None):
+    # Exact-identity lookup through the per-investor rows, like data.investor_deals
+    deals, params = _deals_source(filters)
+    return _deals_frame(_query(store, f'SELECT {DEAL_COLUMNS} FROM {deals} WHERE id IN '
+                                      '(SELECT deal_id FROM deal_investors WHERE investor = ?) ORDER BY id',
+                               params + [investor_name]))
+
+
+def startup_deals(store, startup, filters=None):
+    deals, params = _deals_source(filters)
+    return _deals_frame(_query(store, f'SELECT {DEAL_COLUMNS} FROM {deals} WHERE startup = ? ORDER BY id',
+                               params + [startup]))
+
+
+def startup_profile(store, startup):
+    # First non-missing value of each field, as GroupBy.first gives in build_startup_profiles
+    fields = ['city', 'vertical', 'subvertical']
+    first = ', '.join(f'(SELECT {field} FROM deals WHERE startup = :startup AND {field} IS NOT NULL '
+                      f'ORDER BY id LIMIT 1) AS {field}' for field in fields)
+    profile = _query(store, f'SELECT EXISTS (SELECT 1 FROM deals WHERE startup = :startup) AS known, {first}',
+                     {'startup': startup}).iloc[0]
+    if not profile['known']:
+        return None
+    # Missing fields as NaN, like the pandas profiles
+    values = profile[fields].astype(object)
+    return values.where(values.notna(), np.nan)
+
+
+def similar_startups(store, vertical, startup, limit=5, filters=None):
+    deals, params = _deals_source(filters)
+    return _query(store, f'SELECT startup FROM {deals} WHERE vertical = ? AND startup != ? '
+                         'GROUP BY startup ORDER BY MIN(id) LIMIT ?', params + [vertical, startup, limit])[
+        'startup'].tolist()
+
+
+def filter_mask(store, filters):
+    """filters.filter_mask for the store: a boolean array over the deal ids, True where a deal passes."""
+    deals, params = _deals_source(filters)
+    mask = np.zeros(store['rows'], dtype=bool)
+    mask[_query(store, f'SELECT id FROM {deals}', params)['id'].to_numpy()] = True
+    return mask
+
+
+def coinvestment_graph(store):
+    """The co-investment graph (graph.py) of the store's deals, whose ids are the row positions."""
+    with _connect(store['path']) as conn:
+        pairs = pd.read_sql_query('SELECT deal_id, investor_id FROM deal_investors', conn)
+        deals = pd.read_sql_query('SELECT amount, startup_id FROM deals ORDER BY id', conn)
+        investor_names = entity_names(_read_aliases(conn, 'investor_aliases'))
+        startup_names = entity_names(_read_aliases(conn, 'startup_aliases'))
+    return build_graph(pairs['deal_id'].to_numpy(), pairs['investor_id'].to_numpy(), deals['amount'].to_numpy(),
+                       deals['startup_id'].fillna(-1).to_numpy(), investor_names, startup_names)
+
+
+def _restore(conn, rows, aliases):
+    # Undo an append: drop the deals from id rows on and put back the alias tables as they were
+    conn.execute('DELETE FROM deal_investors WHERE deal_id >= ?', (rows,))
+    conn.execute('DELETE FROM deals WHERE id >= ?', (rows,))
+    for table, previous in aliases.items():
+        conn.execute(f'DELETE FROM {table}')
+        conn.executemany(f'INSERT INTO {table} VALUES (?, ?, ?, ?)',
+                         previous.reset_index().astype(object).itertuples(index=False, name=None))
+
+
+def append_deals(source, csv_path=DATA_PATH):
+    """data.append_deals for the SQL backend: the batch is inserted into the store, then appended to the CSV.
+
+    If the CSV cannot be written, the inserted rows are deleted again, so the store and the CSV
+    never disagree.
+    """
+    delta, rejected = clean_deals(pd.read_csv(source))
+    holder = _store_holder()
+    with holder['lock']:
+        store = holder['store']
+        if not delta.empty:
+            rows = store['rows'] + len(delta)
+            with _connect(store['path']) as conn:
+                aliases = {table: _read_aliases(conn, table) for table in ALIAS_TABLES}
+                _insert_deals(conn, delta, store['rows'])
+                _canonicalize(conn, store['rows'])
+                # No CSV has this version, so a crash before the CSV is written forces a rebuild
+                _set_meta(conn, '', rows)
+                conn.commit()
+                try:
+                    append_to_csv(delta, csv_path)
+                except BaseException:
+                    _restore(conn, store['rows'], aliases)
+                    _set_meta(conn, store['version'], store['rows'])
+                    conn.commit()
+                    raise
+                version = dataset_version(csv_path)
+                _set_meta(conn, version, rows)
+                conn.commit()
+            holder['store'] = {**store, 'version': version, 'rows': rows}
+    return len(delta), rejected
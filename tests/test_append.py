@@ -0,0 +1,100 @@
+import io
+import threading
+
+import pandas as pd
+import pytest
+
+import data
+from data import (DATA_PATH, append_deals, append_to_csv, build_dataset, clean_deals, clean_deals_chunked,
+                  concat_deals, extend_dataset, load_deals, read_clean_csv, union_categories)
+from entities import INVESTOR_WORDS, resolve_aliases
+
+DEALS = """date,startup,vertical,subvertical,city,investors,round,amount
+2019-01-05,Alpha,Fintech,Payments,Bengaluru,"Accel, Sequoia",Seed,12.5
+2019-02-11,Beta,Edtech,Test Prep,Mumbai,Blume Ventures,Series A,123.456789
+2019-03-20,Gamma,Fintech,Lending,Bengaluru,"Sequoia, Blume Ventures",Series B,40
+"""
+# A batch whose optional subvertical is empty in every row, so it is read as float64
+BATCH = """date,startup,vertical,subvertical,city,investors,round,amount
+2019-04-02,Delta,Logistics,,Pune,Accel,Seed,3.25
+2019-05-17,Alpha,Fintech,,Bengaluru,"Accel, Blume Ventures",Series A,7
+"""
+
+
+def _deals(text):
+    deals, rejected = clean_deals(pd.read_csv(io.StringIO(text)))
+    assert rejected.empty
+    return deals
+
+
+def test_batch_with_an_empty_optional_column_reads_as_float():
+    assert _deals(BATCH)['subvertical'].cat.categories.dtype == 'float64'
+
+
+def test_concat_deals_with_an_empty_optional_column():
+    combined = concat_deals(_deals(DEALS), _deals(BATCH))
+    assert isinstance(combined['subvertical'].dtype, pd.CategoricalDtype)
+    assert combined['subvertical'].iloc[:3].tolist() == ['Payments', 'Test Prep', 'Lending']
+    assert combined['subvertical'].iloc[3:].isna().all()
+    assert combined['startup'].tolist() == ['Alpha', 'Beta', 'Gamma', 'Delta', 'Alpha']
+
+
+def test_union_categories_with_every_part_empty():
+    empty = _deals(BATCH)['subvertical']
+    assert union_categories([empty, empty]).isna().all()
+
+
+def test_clean_deals_chunked_matches_a_whole_read():
+    # The last chunk holds only the batch, whose subvertical is empty
+    text = DEALS + BATCH.split('\n', 1)[1]
+    deals, rejected = clean_deals_chunked(io.StringIO(text), chunksize=3)
+    assert rejected == 0
+    pd.testing.assert_frame_equal(deals, _deals(text))
+
+
+def test_extend_dataset_with_an_empty_optional_column():
+    dataset = build_dataset(_deals(DEALS), 'base')
+    extended = extend_dataset(dataset, _deals(BATCH), 'extended')
+    rebuilt = build_dataset(concat_deals(_deals(DEALS), _deals(BATCH)), 'rebuilt')
+    assert len(extended['df']) == 5
+    assert extended['df']['subvertical'].iloc[3:].isna().all()
+    for key in ['investor_names', 'startup_names']:
+        assert extended[key] == rebuilt[key]
+    assert extended['aggregates']['total'] == pytest.approx(rebuilt['aggregates']['total'])
+
+
+def test_append_to_csv_keeps_amounts_as_written(tmp_path):
+    path = tmp_path / 'deals.csv'
+    path.write_text(DEALS)
+    append_to_csv(_deals(BATCH), path)
+    amounts = pd.read_csv(path)['amount'].tolist()
+    assert amounts == [12.5, 123.456789, 40, 3.25, 7]
+    assert '123.456789' in path.read_text()
+
+
+def test_appended_batches_load_from_snapshot_deltas(tmp_path, monkeypatch):
+    path = tmp_path / 'deals.csv'
+    path.write_text(DEALS)
+    holder = {'dataset': build_dataset(load_deals(path), 'base'), 'lock': threading.Lock()}
+    monkeypatch.setattr(data, '_dataset_holder', lambda: holder)
+    append_deals(io.StringIO(BATCH), path)
+    assert (tmp_path / 'deals.delta-1.feather').exists()
+    pd.testing.assert_frame_equal(load_deals(path), read_clean_csv(path), check_categorical=False)
+    # Loading merged the delta into the snapshot
+    assert not (tmp_path / 'deals.delta-1.feather').exists()
+
+
+def test_extend_dataset_resolves_names_like_a_rebuild():
+    deals = read_clean_csv(DATA_PATH)
+    extended = extend_dataset(build_dataset(deals.iloc[:2500], 'base'), deals.iloc[2500:].reset_index(drop=True),
+                              'extended')
+    rebuilt = build_dataset(deals, 'rebuilt')
+    for key in ['startup_aliases', 'investor_aliases']:
+        pd.testing.assert_frame_equal(extended[key][['entity_id', 'canonical']],
+                                      rebuilt[key][['entity_id', 'canonical']])
+
+
+def test_person_like_investors_merge_only_on_the_same_words():
+    counts = pd.Series([1, 1, 1], index=pd.Index(['Manish Gupta', 'Manisha Gupta', 'Gupta Manish'], dtype=object))
+    aliases = resolve_aliases(counts, INVESTOR_WORDS, people=True)
+    assert aliases['entity_id'].tolist() == [0, 1, 0]